@@ -3,17 +3,16 @@
 ASGI application for production deployment with Uvicorn/Gunicorn.
 """
 
-import sys
-from pathlib import Path
-
-# Add the tools to Python path
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
+import os
 
 from tools.main_tool import app
+from tools.generators import warmup
 
 def create_asgi_app():
     """Create ASGI application for production deployment."""
+    # Load generators and templates before the first request arrives
+    warmup()
+    
     # Return the ASGI-compatible HTTP app
     return app.http_app(
         transport="streamable-http",
@@ -34,7 +33,11 @@ if __name__ == "__main__":
         "asgi_app:asgi_app",
         host="0.0.0.0",
         port=8000,
-        log_level="info",
-        access_log=True,
+        # "auto" picks uvloop and httptools when installed, asyncio and h11 otherwise
+        loop="auto",
+        http="auto",
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        log_level="warning",
+        access_log=False,
         reload=False
     )
@@ -5,11 +5,6 @@ FastMCP server runner for Transport Order XML Generator.
 
 import sys
 import asyncio
-from pathlib import Path
-
-# Add the tools to Python path
-current_dir = Path(__file__).parent
-sys.path.insert(0, str(current_dir))
 
 from tools.main_tool import app
 
@@ -24,6 +19,7 @@ def main():
         print("- get_available_transport_types")
         print("- get_transport_order_example")
         print("- get_parameter_requirements")
+        print("- get_cache_stats")
         print("- get_user_credentials")
         print("- send_xml_to_transporeon_api")
         
@@ -8,9 +8,15 @@ based on user input. Supports three transport order types:
 - Ocean Visibility Transport
 """
 
-from .main_tool import generate_transport_order_xml
-
 __version__ = "1.0.0"
 __author__ = "Transport Order Generator"
 
 __all__ = ["generate_transport_order_xml"]
+
+
+def __getattr__(name):
+    """Import the FastMCP tool module only when one of its tools is requested."""
+    if name == "generate_transport_order_xml":
+        from .main_tool import generate_transport_order_xml
+        return generate_transport_order_xml
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,14 +4,102 @@ Transport Order Generators
 Contains generator classes for different transport order types.
 """
 
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
 from .base_generator import BaseGenerator
+from ..utils.template_loader import TemplateLoader
 from .simple_road import SimpleRoadGenerator
 from .complex_road import ComplexRoadGenerator
 from .ocean_visibility import OceanVisibilityGenerator
 
+logger = logging.getLogger(__name__)
+
+# Registry of generator classes by transport type
+GENERATOR_CLASSES = {
+    "simple_road": SimpleRoadGenerator,
+    "complex_road": ComplexRoadGenerator,
+    "ocean_visibility": OceanVisibilityGenerator
+}
+
+# Process-level generator instances, shared across stateless HTTP requests
+_GENERATOR_CACHE: Dict[Tuple[str, Optional[str]], BaseGenerator] = {}
+_GENERATOR_CACHE_LOCK = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def get_generator(transport_type: str, data_path: Optional[str] = None) -> BaseGenerator:
+    """Get the cached generator instance for a transport type, creating it on first use."""
+    if transport_type not in GENERATOR_CLASSES:
+        raise ValueError(f"Unsupported transport type: {transport_type}")
+
+    cache_key = (transport_type, data_path)
+    generator = _GENERATOR_CACHE.get(cache_key)
+    if generator is not None:
+        _cache_stats["hits"] += 1
+        return generator
+
+    with _GENERATOR_CACHE_LOCK:
+        # Another thread may have created it while we were waiting
+        generator = _GENERATOR_CACHE.get(cache_key)
+        if generator is None:
+            _cache_stats["misses"] += 1
+            generator = GENERATOR_CLASSES[transport_type](data_path)
+            _GENERATOR_CACHE[cache_key] = generator
+        else:
+            _cache_stats["hits"] += 1
+
+    return generator
+
+
+def get_template_loader(data_path: Optional[str] = None) -> TemplateLoader:
+    """Get the template loader shared by all generators for a data path."""
+    template_loader, _ = BaseGenerator._get_shared_utilities(data_path)
+    return template_loader
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Get generator cache statistics."""
+    hits = _cache_stats["hits"]
+    misses = _cache_stats["misses"]
+    total = hits + misses
+
+    return {
+        "cached_generators": sorted(t for t, _ in _GENERATOR_CACHE),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0
+    }
+
+
+def warmup(data_path: Optional[str] = None) -> None:
+    """Pre-create every generator and load its template before serving requests."""
+    for transport_type in GENERATOR_CLASSES:
+        try:
+            generator = get_generator(transport_type, data_path)
+            generator.template_loader.load_compiled_template(transport_type)
+        except Exception as e:
+            logger.warning("Warmup failed for transport type '%s': %s", transport_type, e)
+
+
+def clear_generator_cache() -> None:
+    """Clear all cached generator instances and statistics."""
+    with _GENERATOR_CACHE_LOCK:
+        _GENERATOR_CACHE.clear()
+        _cache_stats["hits"] = 0
+        _cache_stats["misses"] = 0
+
+
 __all__ = [
     "BaseGenerator",
-    "SimpleRoadGenerator", 
+    "SimpleRoadGenerator",
     "ComplexRoadGenerator",
-    "OceanVisibilityGenerator"
+    "OceanVisibilityGenerator",
+    "GENERATOR_CLASSES",
+    "get_generator",
+    "get_template_loader",
+    "get_cache_stats",
+    "warmup",
+    "clear_generator_cache"
 ]
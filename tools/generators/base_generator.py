@@ -2,21 +2,60 @@
 Base generator class for transport order XML generation.
 """
 
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from functools import cached_property
+from typing import Dict, Any, FrozenSet, Optional, List, Tuple, ClassVar
 from ..utils.template_loader import TemplateLoader
-from ..utils.xml_builder import XMLDOMBuilder
+from ..utils.xml_builder import XMLDOMBuilder, escape_xml
 from ..utils.parameter_collector import ParameterCollector
 
+# Static XML fragments shared by the section builders
+_STOP_CLOSE = """
+            </date_time_period>
+        </stop>"""
+_PARAMETERS_OPEN = """
+        <parameters>"""
+_PARAMETER_CLOSE = """
+            </parameter>"""
+_PARAMETERS_CLOSE = """
+        </parameters>"""
+
+# Errors raised by malformed input while generating XML; anything else is a bug
+# and propagates to the tool layer, which reports it as a system error
+GENERATION_ERRORS = (KeyError, IndexError, TypeError, ValueError, AttributeError)
+
+# Maximum number of validation results kept per generator
+_VALIDATION_CACHE_SIZE = 256
+
+
+def _freeze(value: Any) -> Any:
+    """Convert JSON-like input into a hashable cache key."""
+    if isinstance(value, dict):
+        return frozenset((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    # Keep the type so that e.g. True, 1 and 1.0 don't share a key
+    return (type(value), value)
+
+
+# XML builder has no per-generator state, so one instance serves all generators
+_XML_BUILDER = XMLDOMBuilder()
+
 
 class BaseGenerator(ABC):
     """Abstract base class for transport order generators."""
     
+    # Template loader and parameter collector shared by all generators, keyed by data_path
+    _utilities_cache: ClassVar[Dict[Optional[str], Tuple[TemplateLoader, ParameterCollector]]] = {}
+    
     def __init__(self, data_path: Optional[str] = None):
         """Initialize base generator with utilities."""
-        self.template_loader = TemplateLoader(data_path)
-        self.xml_builder = XMLDOMBuilder()
-        self.parameter_collector = ParameterCollector(self.template_loader)
+        self.template_loader, self.parameter_collector = self._get_shared_utilities(data_path)
+        self.xml_builder = _XML_BUILDER
+        self._validation_cache: "OrderedDict[Tuple[Any, bool], Dict[str, Any]]" = OrderedDict()
+        self._validation_cache_lock = threading.Lock()
         
         # These should be overridden by subclasses
         self.transport_type = ""
@@ -25,13 +64,59 @@ class BaseGenerator(ABC):
         self.supports_order_items = False
         self.supports_vehicle = False
     
+    @classmethod
+    def _get_shared_utilities(cls, data_path: Optional[str]) -> Tuple[TemplateLoader, ParameterCollector]:
+        """Get the shared template loader and parameter collector for a data path."""
+        utilities = cls._utilities_cache.get(data_path)
+        if utilities is None:
+            template_loader = TemplateLoader(data_path)
+            utilities = (template_loader, ParameterCollector(template_loader))
+            # setdefault keeps the first instance if another thread got here first
+            utilities = cls._utilities_cache.setdefault(data_path, utilities)
+        return utilities
+    
     @abstractmethod
     def generate_xml(self, **kwargs) -> Dict[str, Any]:
         """Generate XML for the specific transport type."""
         pass
     
-    def validate_input(self, user_input: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate user input and return validation results."""
+    def validate_input(self, user_input: Dict[str, Any], fast_fail: bool = True) -> Dict[str, Any]:
+        """
+        Validate user input and return validation results.
+        
+        With fast_fail, validation stops as soon as required fields are missing,
+        skipping optional field suggestions and transport specific checks.
+        Results are cached per input, so identical payloads are validated once.
+        """
+        validation_result = self._validate_input_shared(user_input, fast_fail)
+        
+        # Copy the lists so callers can't modify the cached result
+        return {key: value.copy() if isinstance(value, list) else value for key, value in validation_result.items()}
+    
+    def _validate_input_shared(self, user_input: Dict[str, Any], fast_fail: bool = True) -> Dict[str, Any]:
+        """Validate user input, returning the cached result itself; callers must copy anything they return."""
+        try:
+            cache_key = (_freeze(user_input), fast_fail)
+        except TypeError:
+            # Unhashable input values, validate without caching
+            return self._validate_input_uncached(user_input, fast_fail)
+        
+        with self._validation_cache_lock:
+            cached = self._validation_cache.get(cache_key)
+            if cached is not None:
+                self._validation_cache.move_to_end(cache_key)
+        
+        if cached is None:
+            cached = self._validate_input_uncached(user_input, fast_fail)
+            with self._validation_cache_lock:
+                self._validation_cache[cache_key] = cached
+                if len(self._validation_cache) > _VALIDATION_CACHE_SIZE:
+                    self._validation_cache.popitem(last=False)
+        
+        return cached
+    
+    def _validate_input_uncached(self, user_input: Dict[str, Any], fast_fail: bool) -> Dict[str, Any]:
+        """Validate user input without consulting the validation cache."""
         validation_result = {
             "is_valid": True,
             "errors": [],
@@ -49,6 +134,8 @@ class BaseGenerator(ABC):
             
             if missing_prompts:
                 validation_result["is_valid"] = False
+                if fast_fail:
+                    return validation_result
             
             # Get optional field suggestions
             validation_result["suggested_optional"] = self.parameter_collector.suggest_optional_fields(
@@ -70,170 +157,145 @@ class BaseGenerator(ABC):
     
     def collect_all_parameters(self, user_input: Dict[str, Any]) -> Dict[str, Any]:
         """Collect all parameters needed for XML generation."""
-        collected = {}
-        
-        # Collect basic transport information
-        collected["transport_info"] = self.parameter_collector.collect_basic_transport_info(
-            self.transport_type, user_input
-        )
-        
-        # Collect order details
-        collected["order_details"] = self.parameter_collector.collect_order_details(
-            self.transport_type, user_input
-        )
-        
-        # Collect stops
-        collected["stops"] = self.parameter_collector.collect_stops(user_input)
-        
-        # Collect custom parameters
-        collected["custom_parameters"] = self.parameter_collector.collect_custom_parameters(user_input)
-        
-        return collected
+        return self.parameter_collector.collect_all(self.transport_type, user_input)
     
     def build_basic_structure(self, collected_params: Dict[str, Any]) -> str:
         """Build basic XML structure using template replacement."""
-        template = self.template_loader.load_template(self.transport_type)
+        # Don't clean up placeholders here - let subclasses handle their specific elements first
+        return self.render_template(self.build_basic_replacements(collected_params))
+    
+    def build_basic_replacements(self, collected_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Build placeholder replacements shared by all transport types."""
+        template_keys = self._template_keys
         transport_info = collected_params["transport_info"]
         order_details = collected_params["order_details"]
+        ti_get = transport_info.get
+        od_get = order_details.get
+        transport_number = ti_get("number", "")
+        
+        # Basic transport order fields, stops and stop IDs; scalar values are escaped here,
+        # the stop fragments escape their own values
+        replacements = {
+            "transport_number": escape_xml(transport_number),
+            "status": escape_xml(ti_get("status", "N")),
+            "scheduling_unit": escape_xml(ti_get("scheduling_unit", "")),
+            "order_number": escape_xml(od_get("order_number", transport_number)),
+            "stops": self._build_stops_replacements(collected_params["stops"])["stops"],
+            "loading_stop_ids": self._build_stop_ids_xml(od_get("loading_stop_ids", []), "loading_stop_id"),
+            "unloading_stop_ids": self._build_stop_ids_xml(od_get("unloading_stop_ids", []), "unloading_stop_id")
+        }
         
-        replacements = {}
-        
-        # Basic transport order fields
-        replacements.update({
-            "transport_number": transport_info.get("number", ""),
-            "status": transport_info.get("status", "N"),
-            "scheduling_unit": transport_info.get("scheduling_unit", ""),
-            "order_number": order_details.get("order_number", transport_info.get("number", ""))
-        })
-        
-        # Add carrier creditor number if present
-        if "carrier_creditor_number" in transport_info:
-            replacements["carrier_creditor_number"] = transport_info["carrier_creditor_number"]
-        
-        # DISCOVERY: Add ALL transport_info fields for potential direct replacement
-        for key, value in transport_info.items():
-            if key not in replacements:  # Don't override already set replacements
-                replacements[key] = value
-        
-        # Process stops
-        replacements.update(self._build_stops_replacements(collected_params["stops"]))
-        
-        # Process stop IDs
-        loading_ids = order_details.get("loading_stop_ids", [])
-        unloading_ids = order_details.get("unloading_stop_ids", [])
-        
-        replacements["loading_stop_ids"] = self._build_stop_ids_xml(loading_ids, "loading_stop_id")
-        replacements["unloading_stop_ids"] = self._build_stop_ids_xml(unloading_ids, "unloading_stop_id")
-        
-        # Apply replacements
-        xml_content = self.xml_builder.replace_placeholders(template, replacements)
-        
-        # Don't clean up placeholders here - let subclasses handle their specific elements first
-        return xml_content
+        # DISCOVERY: Add transport_info fields the template uses as direct placeholders
+        # (e.g. carrier_creditor_number, vehicle); already set replacements win on conflict
+        discovered = {key: escape_xml(transport_info[key]) for key in template_keys & transport_info.keys()}
+        return discovered | replacements
+    
+    def render_template(self, replacements: Dict[str, Any]) -> str:
+        """Fill the transport type template with replacements in a single pass."""
+        return self.xml_builder.fill_template(self._compiled_template, replacements)
+    
+    @cached_property
+    def _compiled_template(self) -> Tuple[str, ...]:
+        """Pre-split template for this transport type, resolved once per generator."""
+        return self.template_loader.load_compiled_template(self.transport_type)
+    
+    @cached_property
+    def _template_keys(self) -> FrozenSet[str]:
+        """Placeholder names of the template, resolved once per generator."""
+        return self.template_loader.load_template_keys(self.transport_type)
     
     def _build_stops_replacements(self, stops: List[Dict[str, Any]]) -> Dict[str, str]:
         """Build XML for stops section."""
-        stops_xml = ""
+        parts = []
         
         for stop_data in stops:
-            stops_xml += self._build_single_stop_xml(stop_data)
+            self._build_single_stop_xml(stop_data, parts)
         
-        return {"stops": stops_xml}
+        return {"stops": "".join(parts)}
     
-    def _build_single_stop_xml(self, stop_data: Dict[str, Any]) -> str:
-        """Build XML for a single stop."""
+    def _build_single_stop_xml(self, stop_data: Dict[str, Any], parts: List[str]) -> None:
+        """Append XML for a single stop to parts."""
         location = stop_data["location"]
         period = stop_data["date_time_period"]
+        append = parts.append
         
-        stop_xml = f"""
+        append(f"""
         <stop>
-            <id>{stop_data["id"]}</id>
-            <index>{stop_data["index"]}</index>
+            <id>{escape_xml(stop_data["id"])}</id>
+            <index>{escape_xml(stop_data["index"])}</index>
             <location>
-                <company_name>{location["company_name"]}</company_name>"""
+                <company_name>{escape_xml(location["company_name"])}</company_name>""")
         
         if location.get("street"):
-            stop_xml += f"""
-                <street>{location["street"]}</street>"""
+            append(f"""
+                <street>{escape_xml(location["street"])}</street>""")
         
         if location.get("zip"):
-            stop_xml += f"""
-                <zip>{location["zip"]}</zip>"""
+            append(f"""
+                <zip>{escape_xml(location["zip"])}</zip>""")
         
-        stop_xml += f"""
-                <city>{location["city"]}</city>"""
+        append(f"""
+                <city>{escape_xml(location["city"])}</city>""")
         
         if location.get("state"):
-            stop_xml += f"""
-                <state>{location["state"]}</state>"""
+            append(f"""
+                <state>{escape_xml(location["state"])}</state>""")
         
-        stop_xml += f"""
-                <country>{location["country"]}</country>"""
+        append(f"""
+                <country>{escape_xml(location["country"])}</country>""")
         
         if location.get("comment"):
-            stop_xml += f"""
-                <comment>{location["comment"]}</comment>"""
+            append(f"""
+                <comment>{escape_xml(location["comment"])}</comment>""")
         
-        stop_xml += f"""
+        append(f"""
             </location>
             <date_time_period>
-                <start>{period["start"]}</start>
-                <end>{period["end"]}</end>"""
+                <start>{escape_xml(period["start"])}</start>
+                <end>{escape_xml(period["end"])}</end>""")
         
         if period.get("timezone"):
-            stop_xml += f"""
-                <timezone>{period["timezone"]}</timezone>"""
+            append(f"""
+                <timezone>{escape_xml(period["timezone"])}</timezone>""")
         
-        stop_xml += """
-            </date_time_period>
-        </stop>"""
-        
-        return stop_xml
+        append(_STOP_CLOSE)
     
     def _build_stop_ids_xml(self, stop_ids: List[str], tag_name: str) -> str:
         """Build XML for stop IDs list."""
-        ids_xml = ""
-        for stop_id in stop_ids:
-            ids_xml += f"""
-                    <{tag_name}>{stop_id}</{tag_name}>"""
-        return ids_xml
+        return "".join(f"""
+                    <{tag_name}>{escape_xml(stop_id)}</{tag_name}>""" for stop_id in stop_ids)
     
     def _build_parameters_xml(self, parameters: List[Dict[str, Any]]) -> str:
         """Build XML for parameters section."""
         if not parameters:
             return ""
         
-        params_xml = """
-        <parameters>"""
+        parts = [_PARAMETERS_OPEN]
+        append = parts.append
         
         for param in parameters:
-            qualifier = param["qualifier"]
             value = param.get("value", "")
             
-            param_xml = f"""
-            <parameter qualifier="{qualifier}\""""
+            append(f"""
+            <parameter qualifier="{escape_xml(param["qualifier"])}\"""")
             
             if param.get("shipper_visibility"):
-                param_xml += f""" shipperVisibility="{param["shipper_visibility"]}\""""
+                append(f""" shipperVisibility="{escape_xml(param["shipper_visibility"])}\"""")
             
             if param.get("export_to_carrier"):
-                param_xml += f""" exportToCarrier="{param["export_to_carrier"]}\""""
+                append(f""" exportToCarrier="{escape_xml(param["export_to_carrier"])}\"""")
             
-            param_xml += ">"
+            append(">")
             
             if value:
-                param_xml += f"""
-                <value>{value}</value>"""
-            
-            param_xml += """
-            </parameter>"""
+                append(f"""
+                <value>{escape_xml(value)}</value>""")
             
-            params_xml += param_xml
+            append(_PARAMETER_CLOSE)
         
-        params_xml += """
-        </parameters>"""
+        append(_PARAMETERS_CLOSE)
         
-        return params_xml
+        return "".join(parts)
     
     def finalize_xml(self, xml_content: str) -> str:
         """Finalize XML content with validation and formatting."""
@@ -246,8 +308,9 @@ class BaseGenerator(ABC):
         
         return xml_content
     
-    def get_transport_type_info(self) -> Dict[str, Any]:
-        """Get information about this transport type."""
+    @cached_property
+    def _transport_type_info(self) -> Dict[str, Any]:
+        """Build transport type information once per generator instance."""
         return {
             "transport_type": self.transport_type,
             "supports_pricing": self.supports_pricing,
@@ -255,3 +318,8 @@ class BaseGenerator(ABC):
             "supports_vehicle": self.supports_vehicle,
             "required_fields": self.required_fields
         }
+    
+    def get_transport_type_info(self) -> Dict[str, Any]:
+        """Get information about this transport type."""
+        # Shallow copy so callers can add keys without touching the cached dict
+        return dict(self._transport_type_info)
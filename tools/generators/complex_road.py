@@ -2,8 +2,178 @@
 Complex Road Freight transport order generator.
 """
 
-from typing import Dict, Any, List
-from .base_generator import BaseGenerator
+import copy
+from typing import Dict, Any, Iterator, List
+from .base_generator import BaseGenerator, GENERATION_ERRORS
+from ..utils.xml_builder import escape_xml
+
+# Ocean-specific parameters that are not allowed in complex road freight
+_FORBIDDEN_OCEAN = frozenset({"ocean.scac.no", "ocean.bl.no", "ocean.container.no", "visibility.ocean.product"})
+
+# Parameters that belong at the order level
+_ORDER_LEVEL_QUALIFIERS = frozenset({
+    "custom.preassignedCarrierCreditorNumber",
+    "salesorderNumber",
+    "shuttleTransport",
+    "shuttleTransportAuto",
+    "CPUrecipient",
+    "CSRName",
+    "CSREmail",
+    "CSRPhone",
+    "OrderDate",
+    "transportMode",
+    "shippingPoint",
+    "ShipTo",
+    "material",
+    "route",
+    "purchaseOrderNumber",
+    "PGIDate"
+})
+
+# Parameters that belong at the transport level
+_TRANSPORT_LEVEL_QUALIFIERS = frozenset({
+    "numberofCombinedDeliveries",
+    "combinedloadnumber",
+    "transport.salesorderNumber",
+    "transport.purchaseOrderNumber",
+    "transport.customerPONumber",
+    "custom.resend.carrierprint",
+    "transport.shipperBillTo"
+})
+
+# Item parameters every order item is expected to carry
+_RECOMMENDED_PARAM_QUALIFIERS = ("material", "plantCode", "unitOfMeasurement")
+
+# Fields every order item must provide
+_REQUIRED_ITEM_FIELDS = ("number", "short_description", "material_number")
+
+# Static XML fragments for the order items section
+_ORDER_ITEMS_OPEN = """
+                <order_items>"""
+_ORDER_ITEMS_CLOSE = """
+                </order_items>"""
+_ORDER_ITEM_CLOSE = """
+                    </order_item>"""
+_QUANTITIES_OPEN = """
+                        <quantities>"""
+_QUANTITIES_CLOSE = """
+                        </quantities>"""
+_QUANTITY_CLOSE = """
+                            </quantity>"""
+_ITEM_PARAMETERS_OPEN = """
+                        <parameters>"""
+_ITEM_PARAMETERS_CLOSE = """
+                        </parameters>"""
+_ITEM_PARAMETER_CLOSE = """
+                            </parameter>"""
+
+
+# Example input; get_example_input returns a deep copy
+_EXAMPLE_INPUT = {
+    "number": "0081310198",
+    "status": "D",
+    "scheduling_unit": "BCO",
+    "carrier_creditor_number": "0000203512",
+    "weight_value": 0.0,
+    "volume_value": 0.0,
+    "incoterms": "DAP",
+    "loading_stop_ids": ["BCOT"],
+    "unloading_stop_ids": ["0000017649"],
+    "stops": [
+        {
+            "id": "BCOT",
+            "index": 0,
+            "location": {
+                "company_name": "Bayport CO Truck Terminal",
+                "street": "5761 Underwood, BCO",
+                "zip": "77507",
+                "city": "Pasadena",
+                "state": "TX",
+                "country": "US"
+            },
+            "date_time_period": {
+                "start": "2025-09-25T00:00:00Z",
+                "end": "2025-09-26T23:59:00Z"
+            }
+        },
+        {
+            "id": "0000017649",
+            "index": 1,
+            "location": {
+                "company_name": "THE SHERWIN WILLIAMS COMPANY",
+                "street": "701 SOUTH SHILOH RD DOCK 42",
+                "zip": "75042",
+                "city": "GARLAND",
+                "state": "TX",
+                "country": "US",
+                "comment": "C/O VALSPAR PACKAGING"
+            },
+            "date_time_period": {
+                "start": "2025-09-26T09:00:00Z",
+                "end": "2025-09-26T09:00:00Z"
+            }
+        }
+    ],
+    "order_items": [
+        {
+            "number": "000010",
+            "short_description": "GLYCOL ETHER EB",
+            "material_number": "0205LB",
+            "quantities": [
+                {
+                    "qualifier": "weight",
+                    "value": 45000.0,
+                    "unit": "LBR"
+                },
+                {
+                    "qualifier": "custom.unit.of.measurement",
+                    "value": 0.0
+                }
+            ],
+            "parameters": [
+                {
+                    "qualifier": "technicalDeviation",
+                    "shipper_visibility": "YES"
+                },
+                {
+                    "qualifier": "material",
+                    "value": "0205LB",
+                    "shipper_visibility": "YES"
+                },
+                {
+                    "qualifier": "plantCode",
+                    "value": "US61",
+                    "shipper_visibility": "YES"
+                },
+                {
+                    "qualifier": "customerMaterial",
+                    "value": "0421598"
+                },
+                {
+                    "qualifier": "unitOfMeasurement",
+                    "value": "LBR",
+                    "shipper_visibility": "YES"
+                }
+            ]
+        }
+    ],
+    "parameters": [
+        {
+            "qualifier": "custom.preassignedCarrierCreditorNumber",
+            "value": "0000203512"
+        },
+        {
+            "qualifier": "transportMode",
+            "value": "RO",
+            "shipper_visibility": "YES"
+        },
+        {
+            "qualifier": "transport.salesorderNumber",
+            "value": "0001076772",
+            "shipper_visibility": "YES"
+        }
+    ]
+}
 
 
 class ComplexRoadGenerator(BaseGenerator):
@@ -22,15 +192,16 @@ class ComplexRoadGenerator(BaseGenerator):
         """Generate XML for Complex Road Freight transport order."""
         user_input = kwargs
         
-        # Validate input first
-        validation = self.validate_input(user_input)
+        # Validate input first; the shared result is only read here
+        validation = self._validate_input_shared(user_input)
         if not validation["is_valid"]:
+            # Copy the cached lists so callers can't modify the validation cache
             return {
                 "success": False,
                 "error_type": "validation_error",
-                "errors": validation["errors"],
-                "missing_required": validation["missing_required"],
-                "suggested_optional": validation["suggested_optional"]
+                "errors": list(validation["errors"]),
+                "missing_required": list(validation["missing_required"]),
+                "suggested_optional": list(validation["suggested_optional"])
             }
         
         try:
@@ -40,11 +211,9 @@ class ComplexRoadGenerator(BaseGenerator):
             # Collect order items
             collected_params["order_items"] = self.parameter_collector.collect_order_items(user_input)
             
-            # Build basic XML structure
-            xml_content = self.build_basic_structure(collected_params)
-            
-            # Add complex road specific elements
-            xml_content = self._add_complex_road_elements(xml_content, collected_params)
+            # Fill basic and complex road specific placeholders in one pass
+            replacements = self._build_complex_road_replacements(collected_params) | self.build_basic_replacements(collected_params)
+            xml_content = self.render_template(replacements)
             
             # Finalize XML
             final_xml = self.finalize_xml(xml_content)
@@ -62,7 +231,7 @@ class ComplexRoadGenerator(BaseGenerator):
                 }
             }
             
-        except Exception as e:
+        except GENERATION_ERRORS as e:
             return {
                 "success": False,
                 "error_type": "generation_error",
@@ -87,324 +256,186 @@ class ComplexRoadGenerator(BaseGenerator):
                 validation_result["errors"].append("Carrier creditor number must be 10 digits")
                 validation_result["is_valid"] = False
         
-        # Check for forbidden ocean parameters
-        forbidden_ocean_params = ["ocean.scac.no", "ocean.bl.no", "ocean.container.no", "visibility.ocean.product"]
-        parameters = user_input.get("parameters", [])
-        
-        for param in parameters:
-            if param.get("qualifier") in forbidden_ocean_params:
-                validation_result["errors"].append(f"Ocean parameter '{param['qualifier']}' not allowed in complex road freight")
+        # Check parameters in a single pass: forbidden ocean parameters and
+        # consistency between transport and order level carrier creditor numbers
+        for param in user_input.get("parameters", ()):
+            qualifier = param.get("qualifier")
+            # Qualifier sets hold strings; anything else cannot match and may not be hashable
+            if not isinstance(qualifier, str):
+                continue
+            if qualifier in _FORBIDDEN_OCEAN:
+                validation_result["errors"].append(f"Ocean parameter '{qualifier}' not allowed in complex road freight")
                 validation_result["is_valid"] = False
+            elif qualifier == "custom.preassignedCarrierCreditorNumber" and param.get("value") != carrier_creditor:
+                validation_result["warnings"].append(
+                    "Carrier creditor number inconsistency between transport and order levels"
+                )
         
         # Validate order items if provided
-        order_items = user_input.get("order_items", [])
+        order_items = user_input.get("order_items", ())
         for i, item in enumerate(order_items):
             self._validate_order_item(item, i, validation_result)
-        
-        # Check for consistency between transport and order level carrier creditor numbers
-        transport_carrier = user_input.get("carrier_creditor_number")
-        order_params = user_input.get("parameters", [])
-        
-        for param in order_params:
-            if param.get("qualifier") == "custom.preassignedCarrierCreditorNumber":
-                if param.get("value") != transport_carrier:
-                    validation_result["warnings"].append(
-                        "Carrier creditor number inconsistency between transport and order levels"
-                    )
     
     def _validate_order_item(self, item: Dict[str, Any], index: int, validation_result: Dict[str, Any]) -> None:
         """Validate a single order item."""
-        required_item_fields = ["number", "short_description", "material_number"]
+        errors = validation_result["errors"]
+        warnings = validation_result["warnings"]
+        error_count = len(errors)
+        item_label = f"Order item {index + 1}"
         
-        for field in required_item_fields:
-            if field not in item or not item[field]:
-                validation_result["errors"].append(
-                    f"Order item {index + 1}: Required field '{field}' is missing"
-                )
-                validation_result["is_valid"] = False
+        for field in _REQUIRED_ITEM_FIELDS:
+            if not item.get(field):
+                errors.append(f"{item_label}: Required field '{field}' is missing")
         
         # Validate quantities
-        quantities = item.get("quantities", [])
+        quantities = item.get("quantities")
         if not quantities:
-            validation_result["warnings"].append(f"Order item {index + 1}: No quantities specified")
+            warnings.append(f"{item_label}: No quantities specified")
         else:
             for qty in quantities:
                 if not qty.get("qualifier"):
-                    validation_result["errors"].append(
-                        f"Order item {index + 1}: Quantity qualifier is required"
-                    )
-                    validation_result["is_valid"] = False
+                    errors.append(f"{item_label}: Quantity qualifier is required")
         
         # Validate item parameters
-        item_params = item.get("parameters", [])
-        required_param_qualifiers = ["material", "plantCode", "unitOfMeasurement"]
-        
-        existing_qualifiers = [p.get("qualifier") for p in item_params]
-        for required_qualifier in required_param_qualifiers:
+        # Recommended qualifiers are strings; anything else cannot match and may not be hashable
+        existing_qualifiers = {
+            qualifier for p in item.get("parameters", ()) if isinstance(qualifier := p.get("qualifier"), str)
+        }
+        for required_qualifier in _RECOMMENDED_PARAM_QUALIFIERS:
             if required_qualifier not in existing_qualifiers:
-                validation_result["warnings"].append(
-                    f"Order item {index + 1}: Recommended parameter '{required_qualifier}' is missing"
-                )
+                warnings.append(f"{item_label}: Recommended parameter '{required_qualifier}' is missing")
+        
+        if len(errors) > error_count:
+            validation_result["is_valid"] = False
     
-    def _add_complex_road_elements(self, xml_content: str, collected_params: Dict[str, Any]) -> str:
-        """Add Complex Road specific elements to XML."""
+    def _build_complex_road_replacements(self, collected_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Build Complex Road specific placeholder replacements."""
         transport_info = collected_params["transport_info"]
         order_details = collected_params["order_details"]
+        ti_get = transport_info.get
         
         replacements = {}
         
         # Add weight element with default value
-        weight_value = transport_info.get("weight_value", 0.0)
+        weight_value = ti_get("weight_value", 0.0)
         replacements["weight_element"] = f'''
         <weight>
-            <value>{weight_value}</value>
+            <value>{escape_xml(weight_value)}</value>
         </weight>'''
         
         # Add volume element with default value
-        volume_value = transport_info.get("volume_value", 0.0)
+        volume_value = ti_get("volume_value", 0.0)
         replacements["volume_element"] = f'''
         <volume>
-            <value>{volume_value}</value>
+            <value>{escape_xml(volume_value)}</value>
         </volume>'''
         
         # Add incoterms if provided
         if "incoterms" in order_details:
-            replacements["incoterms_element"] = f"<incoterms>{order_details['incoterms']}</incoterms>"
+            replacements["incoterms_element"] = f"<incoterms>{escape_xml(order_details['incoterms'])}</incoterms>"
         else:
             replacements["incoterms_element"] = ""
         
         # Add order items
-        if collected_params.get("order_items"):
-            replacements["order_items_element"] = self._build_order_items_xml(collected_params["order_items"])
+        order_items = collected_params.get("order_items")
+        if order_items:
+            replacements["order_items_element"] = self._build_order_items_xml(order_items)
         else:
             replacements["order_items_element"] = ""
         
         # Add order-level parameters
-        order_parameters = self._extract_order_parameters(collected_params["custom_parameters"])
+        custom_parameters = collected_params["custom_parameters"]
+        order_parameters = self._extract_order_parameters(custom_parameters)
         if order_parameters:
             replacements["order_parameters_element"] = self._build_parameters_xml(order_parameters)
         else:
             replacements["order_parameters_element"] = ""
         
         # Add transport-level parameters
-        transport_parameters = self._extract_transport_parameters(collected_params["custom_parameters"])
+        transport_parameters = self._extract_transport_parameters(custom_parameters)
         if transport_parameters:
             replacements["transport_parameters_element"] = self._build_parameters_xml(transport_parameters)
         else:
             replacements["transport_parameters_element"] = ""
         
-        # Apply all replacements
-        for placeholder, value in replacements.items():
-            xml_content = xml_content.replace(f"{{{placeholder}}}", value)
-        
-        return xml_content
+        return replacements
     
     def _build_order_items_xml(self, order_items: List[Dict[str, Any]]) -> str:
         """Build order items XML section."""
-        items_xml = """
-                <order_items>"""
+        return "".join(self._iter_order_items_xml(order_items))
+    
+    def _iter_order_items_xml(self, order_items: List[Dict[str, Any]]) -> Iterator[str]:
+        """Yield order items XML section fragments."""
+        yield _ORDER_ITEMS_OPEN
         
         for item in order_items:
-            items_xml += f"""
+            yield from self._iter_order_item_xml(item)
+        
+        yield _ORDER_ITEMS_CLOSE
+    
+    def _iter_order_item_xml(self, item: Dict[str, Any]) -> Iterator[str]:
+        """Yield XML fragments for a single order item."""
+        yield f"""
                     <order_item>
-                        <number>{item['number']}</number>
-                        <short_description>{item['short_description']}</short_description>
-                        <material_number>{item['material_number']}</material_number>"""
+                        <number>{escape_xml(item['number'])}</number>
+                        <short_description>{escape_xml(item['short_description'])}</short_description>
+                        <material_number>{escape_xml(item['material_number'])}</material_number>"""
+        
+        # Add quantities
+        if item.get("quantities"):
+            yield _QUANTITIES_OPEN
             
-            # Add quantities
-            if item.get("quantities"):
-                items_xml += """
-                        <quantities>"""
-                
-                for qty in item["quantities"]:
-                    items_xml += f"""
+            for qty in item["quantities"]:
+                yield f"""
                             <quantity>
-                                <qualifier>{qty['qualifier']}</qualifier>
-                                <value>{qty['value']}</value>"""
-                    
-                    if qty.get("unit"):
-                        items_xml += f"""
-                                <unit>{qty['unit']}</unit>"""
-                    
-                    items_xml += """
-                            </quantity>"""
+                                <qualifier>{escape_xml(qty['qualifier'])}</qualifier>
+                                <value>{escape_xml(qty['value'])}</value>"""
                 
-                items_xml += """
-                        </quantities>"""
+                if qty.get("unit"):
+                    yield f"""
+                                <unit>{escape_xml(qty['unit'])}</unit>"""
+                
+                yield _QUANTITY_CLOSE
             
-            # Add item parameters
-            if item.get("parameters"):
-                items_xml += """
-                        <parameters>"""
+            yield _QUANTITIES_CLOSE
+        
+        # Add item parameters
+        if item.get("parameters"):
+            yield _ITEM_PARAMETERS_OPEN
+            
+            for param in item["parameters"]:
+                yield f"""
+                            <parameter qualifier="{escape_xml(param['qualifier'])}\""""
                 
-                for param in item["parameters"]:
-                    items_xml += f"""
-                            <parameter qualifier="{param['qualifier']}\""""
-                    
-                    if param.get("shipper_visibility"):
-                        items_xml += f""" shipperVisibility="{param['shipper_visibility']}\""""
-                    
-                    items_xml += ">"
-                    
-                    if param.get("value"):
-                        items_xml += f"""
-                                <value>{param['value']}</value>"""
-                    
-                    items_xml += """
-                            </parameter>"""
+                if param.get("shipper_visibility"):
+                    yield f""" shipperVisibility="{escape_xml(param['shipper_visibility'])}\""""
                 
-                items_xml += """
-                        </parameters>"""
+                yield ">"
+                
+                if param.get("value"):
+                    yield f"""
+                                <value>{escape_xml(param['value'])}</value>"""
+                
+                yield _ITEM_PARAMETER_CLOSE
             
-            items_xml += """
-                    </order_item>"""
-        
-        items_xml += """
-                </order_items>"""
+            yield _ITEM_PARAMETERS_CLOSE
         
-        return items_xml
+        yield _ORDER_ITEM_CLOSE
     
     def _extract_order_parameters(self, all_parameters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Extract parameters that belong at the order level."""
-        order_level_qualifiers = [
-            "custom.preassignedCarrierCreditorNumber",
-            "salesorderNumber",
-            "shuttleTransport",
-            "shuttleTransportAuto",
-            "CPUrecipient",
-            "CSRName",
-            "CSREmail",
-            "CSRPhone",
-            "OrderDate",
-            "transportMode",
-            "shippingPoint",
-            "ShipTo",
-            "material",
-            "route",
-            "purchaseOrderNumber",
-            "PGIDate"
+        return [
+            param for param in all_parameters
+            if isinstance(qualifier := param.get("qualifier"), str) and qualifier in _ORDER_LEVEL_QUALIFIERS
         ]
-        
-        return [param for param in all_parameters if param.get("qualifier") in order_level_qualifiers]
     
     def _extract_transport_parameters(self, all_parameters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Extract parameters that belong at the transport level."""
-        transport_level_qualifiers = [
-            "numberofCombinedDeliveries",
-            "combinedloadnumber",
-            "transport.salesorderNumber",
-            "transport.purchaseOrderNumber",
-            "transport.customerPONumber",
-            "custom.resend.carrierprint",
-            "transport.shipperBillTo"
+        return [
+            param for param in all_parameters
+            if isinstance(qualifier := param.get("qualifier"), str) and qualifier in _TRANSPORT_LEVEL_QUALIFIERS
         ]
-        
-        return [param for param in all_parameters if param.get("qualifier") in transport_level_qualifiers]
     
     def get_example_input(self) -> Dict[str, Any]:
         """Get example input for Complex Road Freight."""
-        return {
-            "number": "0081310198",
-            "status": "D",
-            "scheduling_unit": "BCO",
-            "carrier_creditor_number": "0000203512",
-            "weight_value": 0.0,
-            "volume_value": 0.0,
-            "incoterms": "DAP",
-            "loading_stop_ids": ["BCOT"],
-            "unloading_stop_ids": ["0000017649"],
-            "stops": [
-                {
-                    "id": "BCOT",
-                    "index": 0,
-                    "location": {
-                        "company_name": "Bayport CO Truck Terminal",
-                        "street": "5761 Underwood, BCO",
-                        "zip": "77507",
-                        "city": "Pasadena",
-                        "state": "TX",
-                        "country": "US"
-                    },
-                    "date_time_period": {
-                        "start": "2025-09-25T00:00:00Z",
-                        "end": "2025-09-26T23:59:00Z"
-                    }
-                },
-                {
-                    "id": "0000017649",
-                    "index": 1,
-                    "location": {
-                        "company_name": "THE SHERWIN WILLIAMS COMPANY",
-                        "street": "701 SOUTH SHILOH RD DOCK 42",
-                        "zip": "75042",
-                        "city": "GARLAND",
-                        "state": "TX",
-                        "country": "US",
-                        "comment": "C/O VALSPAR PACKAGING"
-                    },
-                    "date_time_period": {
-                        "start": "2025-09-26T09:00:00Z",
-                        "end": "2025-09-26T09:00:00Z"
-                    }
-                }
-            ],
-            "order_items": [
-                {
-                    "number": "000010",
-                    "short_description": "GLYCOL ETHER EB",
-                    "material_number": "0205LB",
-                    "quantities": [
-                        {
-                            "qualifier": "weight",
-                            "value": 45000.0,
-                            "unit": "LBR"
-                        },
-                        {
-                            "qualifier": "custom.unit.of.measurement",
-                            "value": 0.0
-                        }
-                    ],
-                    "parameters": [
-                        {
-                            "qualifier": "technicalDeviation",
-                            "shipper_visibility": "YES"
-                        },
-                        {
-                            "qualifier": "material",
-                            "value": "0205LB",
-                            "shipper_visibility": "YES"
-                        },
-                        {
-                            "qualifier": "plantCode",
-                            "value": "US61",
-                            "shipper_visibility": "YES"
-                        },
-                        {
-                            "qualifier": "customerMaterial",
-                            "value": "0421598"
-                        },
-                        {
-                            "qualifier": "unitOfMeasurement",
-                            "value": "LBR",
-                            "shipper_visibility": "YES"
-                        }
-                    ]
-                }
-            ],
-            "parameters": [
-                {
-                    "qualifier": "custom.preassignedCarrierCreditorNumber",
-                    "value": "0000203512"
-                },
-                {
-                    "qualifier": "transportMode",
-                    "value": "RO",
-                    "shipper_visibility": "YES"
-                },
-                {
-                    "qualifier": "transport.salesorderNumber",
-                    "value": "0001076772",
-                    "shipper_visibility": "YES"
-                }
-            ]
-        }
+        return copy.deepcopy(_EXAMPLE_INPUT)
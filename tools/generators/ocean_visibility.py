@@ -2,8 +2,61 @@
 Ocean Visibility transport order generator.
 """
 
-from typing import Dict, Any, List
-from .base_generator import BaseGenerator
+import copy
+import re
+from collections import ChainMap
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Tuple
+from .base_generator import BaseGenerator, GENERATION_ERRORS
+from ..utils.xml_builder import escape_xml
+
+# Standard Carrier Alpha Code: 4 uppercase letters or digits
+_SCAC_RE = re.compile(r"[A-Z0-9]{4}")
+
+# Fixed values for ocean visibility; read-only since they are shared by all instances
+_FIXED_VALUES = MappingProxyType({
+    "scheduling_unit": "Ocean Visibility",
+    "carrier_creditor_number": "Ocean",
+    "status": "NTO"
+})
+
+# Required ocean parameters
+_REQUIRED_OCEAN_PARAMETERS = ("ocean.scac.no", "ocean.bl.no", "ocean.container.no")
+
+# Road freight elements that ocean visibility orders ignore
+_FORBIDDEN_ELEMENTS = ("vehicle", "prices", "order_items")
+
+
+# Example input; get_example_input returns a deep copy
+_EXAMPLE_INPUT = {
+    "number": "4500831479-20",
+    "ocean.scac.no": "MAEU",
+    "ocean.bl.no": "MAEU258327258",
+    "ocean.container.no": "MMAU1291440",
+    "ocean.booking.no": "",
+    "departure_location": {
+        "company_name": "Camimex Joint Stock Company",
+        "street": "Cao Thang Street",
+        "zip": "",
+        "city": "Ca Mau City",
+        "country": "VN"
+    },
+    "arrival_location": {
+        "company_name": "Factory Bremerhaven DE",
+        "street": "Am Lunedeich",
+        "zip": "27572",
+        "city": "Bremerhaven",
+        "country": "DE"
+    },
+    "departure_date": {
+        "start": "2025-07-13T00:00:00+02:00",
+        "end": "2025-07-13T00:00:00+02:00"
+    },
+    "arrival_date": {
+        "start": "2025-10-11T00:00:00+02:00",
+        "end": "2025-10-11T00:00:00+02:00"
+    }
+}
 
 
 class OceanVisibilityGenerator(BaseGenerator):
@@ -19,32 +72,25 @@ class OceanVisibilityGenerator(BaseGenerator):
         self.supports_vehicle = False
         
         # Fixed values for ocean visibility
-        self.fixed_values = {
-            "scheduling_unit": "Ocean Visibility",
-            "carrier_creditor_number": "Ocean",
-            "status": "NTO"
-        }
+        self.fixed_values = _FIXED_VALUES
         
         # Required ocean parameters
-        self.required_ocean_parameters = [
-            "ocean.scac.no",
-            "ocean.bl.no", 
-            "ocean.container.no"
-        ]
+        self.required_ocean_parameters = _REQUIRED_OCEAN_PARAMETERS
     
     def generate_xml(self, **kwargs) -> Dict[str, Any]:
         """Generate XML for Ocean Visibility transport order."""
         user_input = kwargs
         
-        # Validate input first
-        validation = self.validate_input(user_input)
+        # Validate input first; the shared result is only read here
+        validation = self._validate_input_shared(user_input)
         if not validation["is_valid"]:
+            # Copy the cached lists so callers can't modify the validation cache
             return {
                 "success": False,
                 "error_type": "validation_error",
-                "errors": validation["errors"],
-                "missing_required": validation["missing_required"],
-                "suggested_optional": validation["suggested_optional"]
+                "errors": list(validation["errors"]),
+                "missing_required": list(validation["missing_required"]),
+                "suggested_optional": list(validation["suggested_optional"])
             }
         
         try:
@@ -54,11 +100,9 @@ class OceanVisibilityGenerator(BaseGenerator):
             # Collect ocean-specific parameters
             collected_params["ocean_parameters"] = self.parameter_collector.collect_ocean_parameters(user_input)
             
-            # Build basic XML structure
-            xml_content = self.build_basic_structure(collected_params)
-            
-            # Add ocean visibility specific elements
-            xml_content = self._add_ocean_visibility_elements(xml_content, collected_params)
+            # Fill basic and ocean visibility specific placeholders in one pass
+            replacements = self._build_ocean_visibility_replacements(collected_params) | self.build_basic_replacements(collected_params)
+            xml_content = self.render_template(replacements)
             
             # Finalize XML
             final_xml = self.finalize_xml(xml_content)
@@ -77,7 +121,7 @@ class OceanVisibilityGenerator(BaseGenerator):
                 }
             }
             
-        except Exception as e:
+        except GENERATION_ERRORS as e:
             return {
                 "success": False,
                 "error_type": "generation_error",
@@ -86,24 +130,23 @@ class OceanVisibilityGenerator(BaseGenerator):
     
     def collect_all_parameters(self, user_input: Dict[str, Any]) -> Dict[str, Any]:
         """Override to apply fixed values for ocean visibility."""
-        # Apply fixed values
-        modified_input = user_input.copy()
-        modified_input.update(self.fixed_values)
+        # Set fixed stop IDs
+        overrides = {
+            "loading_stop_ids": ["Departure"],
+            "unloading_stop_ids": ["Arrival"]
+        }
         
         # Set order number same as transport number if not provided
-        if "order_number" not in modified_input:
-            modified_input["order_number"] = modified_input.get("number", "")
+        if "order_number" not in user_input:
+            overrides["order_number"] = user_input.get("number", "")
         
         # Ensure we have exactly 2 stops for ocean visibility
-        if "stops" not in modified_input or len(modified_input["stops"]) != 2:
-            if "departure_location" in modified_input and "arrival_location" in modified_input:
-                modified_input["stops"] = self._build_ocean_stops(modified_input)
-            
-        # Set fixed stop IDs
-        modified_input["loading_stop_ids"] = ["Departure"]
-        modified_input["unloading_stop_ids"] = ["Arrival"]
+        if "stops" not in user_input or len(user_input["stops"]) != 2:
+            if "departure_location" in user_input and "arrival_location" in user_input:
+                overrides["stops"] = self._build_ocean_stops(user_input)
         
-        return super().collect_all_parameters(modified_input)
+        # Layer overrides and fixed values over the user input instead of copying it
+        return super().collect_all_parameters(ChainMap(overrides, self.fixed_values, user_input))
     
     def _build_ocean_stops(self, user_input: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Build the two required stops for ocean visibility."""
@@ -156,126 +199,76 @@ class OceanVisibilityGenerator(BaseGenerator):
         if scac_code and len(scac_code) != 4:
             validation_result["errors"].append("SCAC code must be exactly 4 characters")
             validation_result["is_valid"] = False
-        elif scac_code and not scac_code.replace("0", "A").replace("1", "A").replace("2", "A").replace("3", "A").replace("4", "A").replace("5", "A").replace("6", "A").replace("7", "A").replace("8", "A").replace("9", "A").isalpha():
-            # Check if it's alphanumeric
-            import re
-            if not re.match(r'^[A-Z0-9]{4}$', scac_code):
-                validation_result["errors"].append("SCAC code must contain only uppercase letters and numbers")
-                validation_result["is_valid"] = False
+        elif scac_code and not _SCAC_RE.fullmatch(scac_code):
+            validation_result["errors"].append("SCAC code must contain only uppercase letters and numbers")
+            validation_result["is_valid"] = False
         
         # Check for forbidden elements
-        forbidden_elements = ["vehicle", "prices", "order_items"]
-        for element in forbidden_elements:
+        for element in _FORBIDDEN_ELEMENTS:
             if element in user_input:
                 validation_result["warnings"].append(
                     f"'{element}' is not used in ocean visibility transport orders"
                 )
         
-        # Check for non-ocean parameters
-        parameters = user_input.get("parameters", [])
-        for param in parameters:
+        # Check for non-ocean parameters; a non-string qualifier is never an ocean parameter
+        warnings = validation_result["warnings"]
+        for param in user_input.get("parameters", ()):
             qualifier = param.get("qualifier", "")
-            if not qualifier.startswith("ocean.") and qualifier != "visibility.ocean.product":
-                validation_result["warnings"].append(
-                    f"Parameter '{qualifier}' is not typically used in ocean visibility orders"
-                )
+            if not isinstance(qualifier, str) or (
+                not qualifier.startswith("ocean.") and qualifier != "visibility.ocean.product"
+            ):
+                warnings.append(f"Parameter '{qualifier}' is not typically used in ocean visibility orders")
     
-    def _add_ocean_visibility_elements(self, xml_content: str, collected_params: Dict[str, Any]) -> str:
-        """Add Ocean Visibility specific elements to XML."""
-        ocean_params = collected_params.get("ocean_parameters", {})
+    def _build_ocean_visibility_replacements(self, collected_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Build Ocean Visibility specific placeholder replacements."""
+        ocean_get = collected_params.get("ocean_parameters", {}).get
         
-        replacements = {}
+        # Ocean parameter replacements
+        replacements = {
+            "scac_code": ocean_get("ocean.scac.no", ""),
+            "bl_number": ocean_get("ocean.bl.no", ""),
+            "container_number": ocean_get("ocean.container.no", ""),
+            "booking_number": ocean_get("ocean.booking.no", "")
+        }
         
         # Process stops for ocean visibility template
-        stops = collected_params.get("stops", [])
+        stops = collected_params["stops"]
         if len(stops) >= 2:
-            departure_stop = stops[0]
-            arrival_stop = stops[1]
-            
-            # Departure location replacements
-            dept_loc = departure_stop["location"]
-            replacements.update({
-                "departure_company_name": dept_loc.get("company_name", ""),
-                "departure_street": dept_loc.get("street", ""),
-                "departure_zip": dept_loc.get("zip", ""),
-                "departure_city": dept_loc.get("city", ""),
-                "departure_country": dept_loc.get("country", "")
-            })
-            
-            # Departure date replacements
-            dept_period = departure_stop.get("date_time_period", {})
-            replacements.update({
-                "departure_start_date": dept_period.get("start", ""),
-                "departure_end_date": dept_period.get("end", "")
-            })
-            
-            # Arrival location replacements
-            arr_loc = arrival_stop["location"]
-            replacements.update({
-                "arrival_company_name": arr_loc.get("company_name", ""),
-                "arrival_street": arr_loc.get("street", ""),
-                "arrival_zip": arr_loc.get("zip", ""),
-                "arrival_city": arr_loc.get("city", ""),
-                "arrival_country": arr_loc.get("country", "")
-            })
+            departure_stop, arrival_stop = stops[:2]
+            dept_get = departure_stop["location"].get
+            dept_period_get = departure_stop.get("date_time_period", {}).get
+            arr_get = arrival_stop["location"].get
+            arr_period_get = arrival_stop.get("date_time_period", {}).get
             
-            # Arrival date replacements
-            arr_period = arrival_stop.get("date_time_period", {})
+            # Departure and arrival location and date replacements
             replacements.update({
-                "arrival_start_date": arr_period.get("start", ""),
-                "arrival_end_date": arr_period.get("end", "")
+                "departure_company_name": dept_get("company_name", ""),
+                "departure_street": dept_get("street", ""),
+                "departure_zip": dept_get("zip", ""),
+                "departure_city": dept_get("city", ""),
+                "departure_country": dept_get("country", ""),
+                "departure_start_date": dept_period_get("start", ""),
+                "departure_end_date": dept_period_get("end", ""),
+                "arrival_company_name": arr_get("company_name", ""),
+                "arrival_street": arr_get("street", ""),
+                "arrival_zip": arr_get("zip", ""),
+                "arrival_city": arr_get("city", ""),
+                "arrival_country": arr_get("country", ""),
+                "arrival_start_date": arr_period_get("start", ""),
+                "arrival_end_date": arr_period_get("end", "")
             })
         
-        # Ocean parameter replacements
-        replacements.update({
-            "scac_code": ocean_params.get("ocean.scac.no", ""),
-            "bl_number": ocean_params.get("ocean.bl.no", ""),
-            "container_number": ocean_params.get("ocean.container.no", ""),
-            "booking_number": ocean_params.get("ocean.booking.no", "")
-        })
-        
-        # Apply all replacements
-        for placeholder, value in replacements.items():
-            xml_content = xml_content.replace(f"{{{placeholder}}}", str(value))
-        
-        return xml_content
+        # Every ocean replacement is a plain user value placed into element text
+        return {key: escape_xml(value) for key, value in replacements.items()}
     
     def get_example_input(self) -> Dict[str, Any]:
         """Get example input for Ocean Visibility."""
-        return {
-            "number": "4500831479-20",
-            "ocean.scac.no": "MAEU",
-            "ocean.bl.no": "MAEU258327258",
-            "ocean.container.no": "MMAU1291440",
-            "ocean.booking.no": "",
-            "departure_location": {
-                "company_name": "Camimex Joint Stock Company",
-                "street": "Cao Thang Street",
-                "zip": "",
-                "city": "Ca Mau City",
-                "country": "VN"
-            },
-            "arrival_location": {
-                "company_name": "Factory Bremerhaven DE",
-                "street": "Am Lunedeich",
-                "zip": "27572",
-                "city": "Bremerhaven",
-                "country": "DE"
-            },
-            "departure_date": {
-                "start": "2025-07-13T00:00:00+02:00",
-                "end": "2025-07-13T00:00:00+02:00"
-            },
-            "arrival_date": {
-                "start": "2025-10-11T00:00:00+02:00",
-                "end": "2025-10-11T00:00:00+02:00"
-            }
-        }
+        return copy.deepcopy(_EXAMPLE_INPUT)
     
-    def get_required_ocean_parameters(self) -> List[str]:
-        """Get list of required ocean parameters."""
-        return self.required_ocean_parameters.copy()
+    def get_required_ocean_parameters(self) -> Tuple[str, ...]:
+        """Get required ocean parameters."""
+        return self.required_ocean_parameters
     
-    def get_fixed_values(self) -> Dict[str, str]:
-        """Get fixed values for ocean visibility."""
-        return self.fixed_values.copy()
+    def get_fixed_values(self) -> Mapping[str, str]:
+        """Get read-only fixed values for ocean visibility."""
+        return self.fixed_values
@@ -2,8 +2,73 @@
 Simple Road Freight transport order generator.
 """
 
+import copy
 from typing import Dict, Any, List
-from .base_generator import BaseGenerator
+from .base_generator import BaseGenerator, GENERATION_ERRORS
+from ..utils.xml_builder import escape_xml
+
+# Ocean-specific parameters that are not allowed in simple road freight
+_FORBIDDEN_OCEAN = frozenset({"ocean.scac.no", "ocean.bl.no", "ocean.container.no", "visibility.ocean.product"})
+
+# Loading meter is always emitted, without a value
+_EMPTY_LOADING_METER = '<loading_meter unit="m"></loading_meter>'
+
+
+# Example input; get_example_input returns a deep copy
+_EXAMPLE_INPUT = {
+    "number": "1404338",
+    "status": "N",
+    "scheduling_unit": "Wörth",
+    "vehicle": "MEGA:Stehend",
+    "price_reference": 845.0,
+    "price_currency": "EUR",
+    "weight_value": 23106,
+    "distance_value": 1153,
+    "comment": "rolls in mm : 2800",
+    "loading_stop_ids": ["1"],
+    "unloading_stop_ids": ["2"],
+    "stops": [
+        {
+            "id": "1",
+            "index": 0,
+            "location": {
+                "company_name": "Papierfabrik Palm (PM 6)",
+                "street": "Am Oberwald 2",
+                "zip": "76744",
+                "city": "Wörth",
+                "country": "DE"
+            },
+            "date_time_period": {
+                "start": "2025-09-25T00:00:00+02:00",
+                "end": "2025-09-25T23:59:00+02:00",
+                "timezone": "Europe/Berlin"
+            }
+        },
+        {
+            "id": "2",
+            "index": 1,
+            "location": {
+                "company_name": "WOK Sp. z o.o.",
+                "street": "Podgórna 104",
+                "zip": "87300",
+                "city": "Brodnica",
+                "country": "PL",
+                "comment": "ZF: 12:00"
+            },
+            "date_time_period": {
+                "start": "2025-09-29T00:00:00+02:00",
+                "end": "2025-09-29T00:00:00+02:00",
+                "timezone": "Europe/Berlin"
+            }
+        }
+    ],
+    "parameters": [
+        {
+            "qualifier": "custom.important.info",
+            "value": "<span style=\"color: #ff0000; font-size: 10pt;\"></span>"
+        }
+    ]
+}
 
 
 class SimpleRoadGenerator(BaseGenerator):
@@ -22,26 +87,25 @@ class SimpleRoadGenerator(BaseGenerator):
         """Generate XML for Simple Road Freight transport order."""
         user_input = kwargs
         
-        # Validate input first
-        validation = self.validate_input(user_input)
+        # Validate input first; the shared result is only read here
+        validation = self._validate_input_shared(user_input)
         if not validation["is_valid"]:
+            # Copy the cached lists so callers can't modify the validation cache
             return {
                 "success": False,
                 "error_type": "validation_error",
-                "errors": validation["errors"],
-                "missing_required": validation["missing_required"],
-                "suggested_optional": validation["suggested_optional"]
+                "errors": list(validation["errors"]),
+                "missing_required": list(validation["missing_required"]),
+                "suggested_optional": list(validation["suggested_optional"])
             }
         
         try:
             # Collect all parameters
             collected_params = self.collect_all_parameters(user_input)
             
-            # Build basic XML structure (will have placeholders)
-            xml_content = self.build_basic_structure(collected_params)
-            
-            # Add simple road specific elements (replaces remaining placeholders)
-            xml_content = self._add_simple_road_elements(xml_content, collected_params)
+            # Fill basic and simple road specific placeholders in one pass
+            replacements = self._build_simple_road_replacements(collected_params) | self.build_basic_replacements(collected_params)
+            xml_content = self.render_template(replacements)
             
             # Finalize XML
             final_xml = self.finalize_xml(xml_content)
@@ -59,7 +123,7 @@ class SimpleRoadGenerator(BaseGenerator):
                 }
             }
             
-        except Exception as e:
+        except GENERATION_ERRORS as e:
             return {
                 "success": False,
                 "error_type": "generation_error",
@@ -77,13 +141,18 @@ class SimpleRoadGenerator(BaseGenerator):
             validation_result["warnings"].append("More than 10 stops is unusual for simple road freight")
         
         # Check for forbidden parameters (ocean-specific)
-        forbidden_ocean_params = ["ocean.scac.no", "ocean.bl.no", "ocean.container.no", "visibility.ocean.product"]
-        parameters = user_input.get("parameters", [])
-        
-        for param in parameters:
-            if param.get("qualifier") in forbidden_ocean_params:
-                validation_result["errors"].append(f"Ocean parameter '{param['qualifier']}' not allowed in simple road freight")
-                validation_result["is_valid"] = False
+        # Forbidden qualifiers are strings; anything else cannot match and may not be hashable
+        qualifiers = [
+            qualifier for param in user_input.get("parameters", ())
+            if isinstance(qualifier := param.get("qualifier"), str)
+        ]
+        
+        # Only walk the qualifiers again when at least one is forbidden
+        if not _FORBIDDEN_OCEAN.isdisjoint(qualifiers):
+            for qualifier in qualifiers:
+                if qualifier in _FORBIDDEN_OCEAN:
+                    validation_result["errors"].append(f"Ocean parameter '{qualifier}' not allowed in simple road freight")
+            validation_result["is_valid"] = False
         
         # Validate pricing if provided
         if "price_reference" in user_input and user_input["price_reference"] <= 0:
@@ -95,8 +164,8 @@ class SimpleRoadGenerator(BaseGenerator):
             validation_result["errors"].append("Weight value cannot be negative")
             validation_result["is_valid"] = False
     
-    def _add_simple_road_elements(self, xml_content: str, collected_params: Dict[str, Any]) -> str:
-        """Add Simple Road specific elements to XML."""
+    def _build_simple_road_replacements(self, collected_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Build Simple Road specific placeholder replacements."""
         transport_info = collected_params["transport_info"]
         order_details = collected_params["order_details"]
         
@@ -104,14 +173,13 @@ class SimpleRoadGenerator(BaseGenerator):
         
         # Add vehicle element if provided
         if "vehicle" in transport_info:
-            replacements["vehicle_element"] = f"<vehicle>{transport_info['vehicle']}</vehicle>"
+            replacements["vehicle_element"] = f"<vehicle>{escape_xml(transport_info['vehicle'])}</vehicle>"
         else:
             replacements["vehicle_element"] = ""
         
         # Add pricing element if provided
-        if self._has_pricing(collected_params):
-            pricing_xml = self._build_pricing_xml(transport_info)
-            replacements["prices_element"] = pricing_xml
+        if "price_reference" in transport_info:
+            replacements["prices_element"] = self._build_pricing_xml(transport_info)
         else:
             replacements["prices_element"] = ""
         
@@ -119,19 +187,19 @@ class SimpleRoadGenerator(BaseGenerator):
         if "weight_value" in order_details:
             replacements["weight_element"] = f'''
                 <weight unit="kg">
-                    <value>{order_details["weight_value"]}</value>
+                    <value>{escape_xml(order_details["weight_value"])}</value>
                 </weight>'''
         else:
             replacements["weight_element"] = ""
         
         # Add loading meter element (can be empty)
-        replacements["loading_meter_element"] = '<loading_meter unit="m"></loading_meter>'
+        replacements["loading_meter_element"] = _EMPTY_LOADING_METER
         
         # Add distance element if provided
         if "distance_value" in order_details:
             replacements["distance_element"] = f'''
                 <distance unit="km">
-                    <value>{order_details["distance_value"]}</value>
+                    <value>{escape_xml(order_details["distance_value"])}</value>
                 </distance>'''
         else:
             replacements["distance_element"] = ""
@@ -139,22 +207,18 @@ class SimpleRoadGenerator(BaseGenerator):
         # Add comment element if provided
         if "comment" in order_details:
             # Escape HTML entities in comments
-            comment = order_details["comment"].replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-            replacements["comment_element"] = f"<comment>{comment}</comment>"
+            replacements["comment_element"] = f"<comment>{escape_xml(order_details['comment'])}</comment>"
         else:
             replacements["comment_element"] = ""
         
         # Add parameters if any
-        if collected_params["custom_parameters"]:
-            replacements["parameters_element"] = self._build_parameters_xml(collected_params["custom_parameters"])
+        custom_parameters = collected_params["custom_parameters"]
+        if custom_parameters:
+            replacements["parameters_element"] = self._build_parameters_xml(custom_parameters)
         else:
             replacements["parameters_element"] = ""
         
-        # Apply all replacements
-        for placeholder, value in replacements.items():
-            xml_content = xml_content.replace(f"{{{placeholder}}}", value)
-        
-        return xml_content
+        return replacements
     
     def _has_pricing(self, collected_params: Dict[str, Any]) -> bool:
         """Check if pricing information is available."""
@@ -168,67 +232,13 @@ class SimpleRoadGenerator(BaseGenerator):
     
     def _build_pricing_xml(self, transport_info: Dict[str, Any]) -> str:
         """Build pricing XML section."""
-        reference = transport_info.get("price_reference", 0)
-        currency = transport_info.get("price_currency", "EUR")
-        mode = transport_info.get("price_mode", "DEFAULT")
+        ti_get = transport_info.get
+        reference = ti_get("price_reference", 0)
+        currency = ti_get("price_currency", "EUR")
+        mode = ti_get("price_mode", "DEFAULT")
         
-        pricing_xml = f"<prices>\n            <reference>{reference}</reference>\n            <currency>{currency}</currency>\n            <mode>{mode}</mode>\n        </prices>"
-        
-        return pricing_xml
+        return f"<prices>\n            <reference>{escape_xml(reference)}</reference>\n            <currency>{escape_xml(currency)}</currency>\n            <mode>{escape_xml(mode)}</mode>\n        </prices>"
     
     def get_example_input(self) -> Dict[str, Any]:
         """Get example input for Simple Road Freight."""
-        return {
-            "number": "1404338",
-            "status": "N",
-            "scheduling_unit": "Wörth",
-            "vehicle": "MEGA:Stehend",
-            "price_reference": 845.0,
-            "price_currency": "EUR",
-            "weight_value": 23106,
-            "distance_value": 1153,
-            "comment": "rolls in mm : 2800",
-            "loading_stop_ids": ["1"],
-            "unloading_stop_ids": ["2"],
-            "stops": [
-                {
-                    "id": "1",
-                    "index": 0,
-                    "location": {
-                        "company_name": "Papierfabrik Palm (PM 6)",
-                        "street": "Am Oberwald 2",
-                        "zip": "76744",
-                        "city": "Wörth",
-                        "country": "DE"
-                    },
-                    "date_time_period": {
-                        "start": "2025-09-25T00:00:00+02:00",
-                        "end": "2025-09-25T23:59:00+02:00",
-                        "timezone": "Europe/Berlin"
-                    }
-                },
-                {
-                    "id": "2",
-                    "index": 1,
-                    "location": {
-                        "company_name": "WOK Sp. z o.o.",
-                        "street": "Podgórna 104",
-                        "zip": "87300",
-                        "city": "Brodnica",
-                        "country": "PL",
-                        "comment": "ZF: 12:00"
-                    },
-                    "date_time_period": {
-                        "start": "2025-09-29T00:00:00+02:00",
-                        "end": "2025-09-29T00:00:00+02:00",
-                        "timezone": "Europe/Berlin"
-                    }
-                }
-            ],
-            "parameters": [
-                {
-                    "qualifier": "custom.important.info",
-                    "value": "<span style=\"color: #ff0000; font-size: 10pt;\"></span>"
-                }
-            ]
-        }
+        return copy.deepcopy(_EXAMPLE_INPUT)
@@ -2,20 +2,35 @@
 Main FastMCP tool definitions for Transport Order XML Generator.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+import io
+import logging
+import re
 import json
 import base64
+from functools import lru_cache
+from itertools import islice
+import xml.etree.ElementTree as ET
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from fastmcp import FastMCP
 
+try:
+    # Optional faster JSON parser (listed in requirements.txt)
+    import ujson
+    _json_loads = ujson.loads
+except ImportError:
+    _json_loads = json.loads
+
+from .generators import GENERATOR_CLASSES, get_generator, get_template_loader, get_cache_stats as get_generator_cache_stats
 from .generators.base_generator import BaseGenerator
-from .generators.simple_road import SimpleRoadGenerator
-from .generators.complex_road import ComplexRoadGenerator
-from .generators.ocean_visibility import OceanVisibilityGenerator
 from .validation.structural_validator import StructuralValidator
 from .validation.business_validator import BusinessValidator
 from .utils.template_loader import TemplateLoader
 
+logger = logging.getLogger(__name__)
+
 
 class TransportOrderFactory:
     """Factory for creating transport order generators."""
@@ -23,28 +38,39 @@ class TransportOrderFactory:
     def __init__(self, data_path: Optional[str] = None):
         """Initialize factory with optional data path."""
         self.data_path = data_path
-        self.generators = {
-            "simple_road": SimpleRoadGenerator,
-            "complex_road": ComplexRoadGenerator,
-            "ocean_visibility": OceanVisibilityGenerator
-        }
+        self.generators = GENERATOR_CLASSES
+        self._types_frozen = frozenset(self.generators)
+        self._types_list = tuple(self.generators)
+        self._validators: Optional[Tuple[StructuralValidator, BusinessValidator]] = None
     
     def create_generator(self, transport_type: str) -> BaseGenerator:
-        """Create generator instance for specified transport type."""
-        if transport_type not in self.generators:
-            raise ValueError(f"Unsupported transport type: {transport_type}")
-        
-        generator_class = self.generators[transport_type]
-        return generator_class(self.data_path)
+        """Get the process-level generator instance for specified transport type."""
+        return get_generator(transport_type, self.data_path)
     
     def get_available_types(self) -> list:
         """Get list of available transport types."""
-        return list(self.generators.keys())
+        return list(self._types_list)
+    
+    def has_type(self, transport_type: str) -> bool:
+        """Check whether a transport type is supported."""
+        return transport_type in self._types_frozen
     
     def get_transport_type_info(self, transport_type: str) -> Dict[str, Any]:
         """Get information about a specific transport type."""
         generator = self.create_generator(transport_type)
         return generator.get_transport_type_info()
+    
+    def get_template_loader(self) -> TemplateLoader:
+        """Get the template loader shared with the generators."""
+        return get_template_loader(self.data_path)
+    
+    def get_validators(self) -> Tuple[StructuralValidator, BusinessValidator]:
+        """Get the shared structural and business validators, creating them on first use."""
+        if self._validators is None:
+            template_loader = self.get_template_loader()
+            self._validators = (StructuralValidator(template_loader), BusinessValidator(template_loader))
+        
+        return self._validators
 
 
 # Initialize FastMCP server
@@ -56,6 +82,59 @@ app = FastMCP(
 # Initialize factory
 factory = TransportOrderFactory()
 
+def _invalid_transport_type_error(error_message: str) -> Dict[str, Any]:
+    """Build the error result for an unsupported transport type."""
+    return {
+        "success": False,
+        "error_type": "invalid_transport_type",
+        "error_message": error_message,
+        "available_types": factory.get_available_types()
+    }
+
+
+# Human readable descriptions of the supported transport types
+_TYPE_DESCRIPTIONS = {
+    "simple_road": "Simple/Standard Road Freight - Basic transport orders with stops, optional pricing and vehicle info",
+    "complex_road": "Complex Road Freight - Advanced transport orders with order items, parameters, and carrier information",
+    "ocean_visibility": "Ocean Visibility Transport - Maritime shipment tracking with mandatory ocean-specific parameters"
+}
+
+# Transport types are fixed at import time, so the response is built once and copied per call
+_AVAILABLE_TYPES_RESPONSE = {
+    "success": True,
+    "transport_types": factory.get_available_types(),
+    "descriptions": {t: _TYPE_DESCRIPTIONS.get(t, "No description available") for t in factory.get_available_types()},
+    "total_count": len(factory.get_available_types())
+}
+
+# Transporeon API base URLs by environment
+_BASE_URLS = {
+    "test": "https://xch.test.transporeon.com/openapi",
+    "production": "https://xch.transporeon.com/openapi"
+}
+
+# Headers sent with every API request, besides Authorization
+_BASE_HEADERS = {
+    'Content-Type': 'application/xml',
+    'Accept': 'application/xml'
+}
+
+# Bytes of a successful API response body returned to the caller
+_SUCCESS_CONTENT_PREVIEW = 512
+
+# API response headers returned to the caller
+_RESPONSE_HEADER_KEYS = ("Content-Type", "Request-Id", "X-Request-Id", "Location")
+
+# Shared HTTP session so consecutive API calls reuse keep-alive connections.
+# Only connection failures are retried: the request was never sent, so a
+# transport order can't be posted twice.
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.3)
+))
+
 
 @app.tool()
 def generate_transport_order_xml(
@@ -79,18 +158,13 @@ def generate_transport_order_xml(
     """
     try:
         # Validate transport type
-        if transport_type not in factory.get_available_types():
-            return {
-                "success": False,
-                "error_type": "invalid_transport_type",
-                "error_message": f"Unsupported transport type: {transport_type}",
-                "available_types": factory.get_available_types()
-            }
+        if not factory.has_type(transport_type):
+            return _invalid_transport_type_error(f"Unsupported transport type: {transport_type}")
         
         # Parse order data JSON
         try:
-            kwargs = json.loads(order_data)
-        except json.JSONDecodeError as e:
+            kwargs = _json_loads(order_data)
+        except ValueError as e:
             return {
                 "success": False,
                 "error_type": "invalid_json",
@@ -125,12 +199,8 @@ def get_transport_type_info(transport_type: str) -> Dict[str, Any]:
         Dict containing transport type specifications and requirements
     """
     try:
-        if transport_type not in factory.get_available_types():
-            return {
-                "success": False,
-                "error_message": f"Unknown transport type: {transport_type}",
-                "available_types": factory.get_available_types()
-            }
+        if not factory.has_type(transport_type):
+            return _invalid_transport_type_error(f"Unknown transport type: {transport_type}")
         
         info = factory.get_transport_type_info(transport_type)
         
@@ -162,10 +232,8 @@ def validate_transport_order_xml(xml_content: str, transport_type: str) -> Dict[
         Dict containing validation results
     """
     try:
-        # Initialize validators
-        template_loader = TemplateLoader()
-        structural_validator = StructuralValidator(template_loader)
-        business_validator = BusinessValidator(template_loader)
+        # Get shared validators
+        structural_validator, business_validator = factory.get_validators()
         
         result = {
             "success": True,
@@ -177,8 +245,14 @@ def validate_transport_order_xml(xml_content: str, transport_type: str) -> Dict[
             "warnings": []
         }
         
+        # Parse once and share the tree; on a parse error each validator reports it itself
+        try:
+            root = ET.fromstring(xml_content)
+        except ET.ParseError:
+            root = None
+        
         # Structural validation
-        structural_result = structural_validator.validate_xml_structure(xml_content)
+        structural_result = structural_validator.validate_xml_structure(xml_content, root)
         result["structural_validation"] = structural_result
         
         if not structural_result["is_valid"]:
@@ -188,7 +262,7 @@ def validate_transport_order_xml(xml_content: str, transport_type: str) -> Dict[
         result["warnings"].extend(structural_result.get("warnings", []))
         
         # Field format validation
-        format_result = structural_validator.validate_field_formats(xml_content)
+        format_result = structural_validator.validate_field_formats(xml_content, root)
         if not format_result["is_valid"]:
             result["is_valid"] = False
             result["errors"].extend(format_result["errors"])
@@ -196,7 +270,7 @@ def validate_transport_order_xml(xml_content: str, transport_type: str) -> Dict[
         result["warnings"].extend(format_result.get("warnings", []))
         
         # Stop reference validation
-        ref_result = structural_validator.validate_stop_references(xml_content)
+        ref_result = structural_validator.validate_stop_references(xml_content, root)
         if not ref_result["is_valid"]:
             result["is_valid"] = False
             result["errors"].extend(ref_result["errors"])
@@ -204,7 +278,7 @@ def validate_transport_order_xml(xml_content: str, transport_type: str) -> Dict[
         result["warnings"].extend(ref_result.get("warnings", []))
         
         # Business rule validation
-        business_result = business_validator.validate_transport_type_rules(xml_content, transport_type)
+        business_result = business_validator.validate_transport_type_rules(xml_content, transport_type, root)
         result["business_validation"] = business_result
         
         if not business_result["is_valid"]:
@@ -214,7 +288,7 @@ def validate_transport_order_xml(xml_content: str, transport_type: str) -> Dict[
         result["warnings"].extend(business_result.get("warnings", []))
         
         # Cross-field validation
-        cross_field_result = business_validator.validate_cross_field_consistency(xml_content)
+        cross_field_result = business_validator.validate_cross_field_consistency(xml_content, root)
         result["cross_field_validation"] = cross_field_result
         
         if not cross_field_result["is_valid"]:
@@ -225,7 +299,7 @@ def validate_transport_order_xml(xml_content: str, transport_type: str) -> Dict[
         
         # Ocean-specific validation
         if transport_type == "ocean_visibility":
-            ocean_result = business_validator.validate_ocean_completeness(xml_content)
+            ocean_result = business_validator.validate_ocean_completeness(xml_content, root)
             if not ocean_result["is_valid"]:
                 result["is_valid"] = False
                 result["errors"].extend(ocean_result["errors"])
@@ -249,26 +323,11 @@ def get_available_transport_types() -> Dict[str, Any]:
     Returns:
         Dict containing available transport types and their descriptions
     """
-    try:
-        types = factory.get_available_types()
-        type_descriptions = {
-            "simple_road": "Simple/Standard Road Freight - Basic transport orders with stops, optional pricing and vehicle info",
-            "complex_road": "Complex Road Freight - Advanced transport orders with order items, parameters, and carrier information",
-            "ocean_visibility": "Ocean Visibility Transport - Maritime shipment tracking with mandatory ocean-specific parameters"
-        }
-        
-        return {
-            "success": True,
-            "transport_types": types,
-            "descriptions": {t: type_descriptions.get(t, "No description available") for t in types},
-            "total_count": len(types)
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "error_message": f"Error getting transport types: {str(e)}"
-        }
+    # Copy so callers can't modify the shared response
+    response = dict(_AVAILABLE_TYPES_RESPONSE)
+    response["transport_types"] = list(response["transport_types"])
+    response["descriptions"] = dict(response["descriptions"])
+    return response
 
 
 @app.tool()
@@ -283,12 +342,8 @@ def get_transport_order_example(transport_type: str) -> Dict[str, Any]:
         Dict containing example XML, input data, and metadata
     """
     try:
-        if transport_type not in factory.get_available_types():
-            return {
-                "success": False,
-                "error_message": f"Unknown transport type: {transport_type}",
-                "available_types": factory.get_available_types()
-            }
+        if not factory.has_type(transport_type):
+            return _invalid_transport_type_error(f"Unknown transport type: {transport_type}")
         
         generator = factory.create_generator(transport_type)
         
@@ -303,8 +358,7 @@ def get_transport_order_example(transport_type: str) -> Dict[str, Any]:
         
         # Load example XML
         try:
-            template_loader = TemplateLoader()
-            example_xml = template_loader.load_example(transport_type)
+            example_xml = factory.get_template_loader().load_example(transport_type)
             result["example_xml"] = example_xml
         except FileNotFoundError:
             result["example_xml"] = None
@@ -331,14 +385,10 @@ def get_parameter_requirements(transport_type: str) -> Dict[str, Any]:
         Dict containing parameter requirements and validation rules
     """
     try:
-        if transport_type not in factory.get_available_types():
-            return {
-                "success": False,
-                "error_message": f"Unknown transport type: {transport_type}",
-                "available_types": factory.get_available_types()
-            }
+        if not factory.has_type(transport_type):
+            return _invalid_transport_type_error(f"Unknown transport type: {transport_type}")
         
-        template_loader = TemplateLoader()
+        template_loader = factory.get_template_loader()
         
         result = {
             "success": True,
@@ -361,6 +411,27 @@ def get_parameter_requirements(transport_type: str) -> Dict[str, Any]:
         }
 
 
+@app.tool()
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Get statistics for the process-level generator cache.
+    
+    Returns:
+        Dict containing cached generators, hit/miss counts and hit rate
+    """
+    try:
+        return {
+            "success": True,
+            "generator_cache": get_generator_cache_stats()
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "error_message": f"Error getting cache stats: {str(e)}"
+        }
+
+
 def _format_user_credentials(
     username: str,
     company_id: str,
@@ -378,32 +449,18 @@ def _format_user_credentials(
         Dict containing formatted credentials and success status
     """
     try:
-        # Validate inputs
-        if not username or not username.strip():
-            return {
-                "success": False,
-                "error_type": "invalid_input",
-                "error_message": "Username cannot be empty"
-            }
+        # Strip each input once, then validate
+        username = username.strip() if username else ""
+        company_id = company_id.strip() if company_id else ""
+        password = password.strip() if password else ""
         
-        if not company_id or not company_id.strip():
-            return {
-                "success": False,
-                "error_type": "invalid_input",
-                "error_message": "Company ID cannot be empty"
-            }
-        
-        if not password or not password.strip():
-            return {
-                "success": False,
-                "error_type": "invalid_input",
-                "error_message": "Password cannot be empty"
-            }
-        
-        # Clean inputs (strip whitespace)
-        username = username.strip()
-        company_id = company_id.strip()
-        password = password.strip()
+        for value, label in ((username, "Username"), (company_id, "Company ID"), (password, "Password")):
+            if not value:
+                return {
+                    "success": False,
+                    "error_type": "invalid_input",
+                    "error_message": f"{label} cannot be empty"
+                }
         
         # Format credentials
         credentials = f"{username}@{company_id}:{password}"
@@ -448,6 +505,30 @@ def get_user_credentials(
     return _format_user_credentials(username, company_id, password)
 
 
+# Root transport_orders element, optionally prefixed, after an XML declaration and comments.
+# PI and comment bodies cannot run past their own terminator, so a failed match stays linear.
+_TRANSPORT_ORDERS_ROOT_RE = re.compile(
+    r"\s*(?:<\?(?:[^?]|\?(?!>))*\?>\s*|<!--(?:[^-]|-(?!->))*-->\s*)*<(?:[\w.-]+:)?transport_orders[\s/>]"
+)
+
+# Opening transport_order tags, counted to reject oversized batches before sending
+_TRANSPORT_ORDER_TAG_RE = re.compile(r"<(?:[\w.-]+:)?transport_order[\s/>]")
+
+# Maximum transport orders accepted per batch by the API
+_MAX_BATCH_SIZE = 1000
+
+_TRANSPORT_ORDERS_ANALYSIS = {
+    "message_type": "transport_orders",
+    "endpoint_path": "/v2/transport_orders"
+}
+
+
+@lru_cache(maxsize=128)
+def _encode_basic_credentials(credentials: str) -> str:
+    """Base64-encode credentials for the Basic Authorization header."""
+    return base64.b64encode(credentials.encode()).decode()
+
+
 def _analyze_xml_content(xml_content: str) -> Dict[str, str]:
     """
     Analyze XML content to determine the correct API endpoint.
@@ -458,21 +539,27 @@ def _analyze_xml_content(xml_content: str) -> Dict[str, str]:
     Returns:
         Dict containing message_type and endpoint_path
     """
+    # Fast path: the root element is visible right after the prolog in almost every payload
+    if _TRANSPORT_ORDERS_ROOT_RE.match(xml_content):
+        return _TRANSPORT_ORDERS_ANALYSIS.copy()
+    
     try:
-        import xml.etree.ElementTree as ET
-        
-        # Parse XML to identify message type
-        root = ET.fromstring(xml_content)
+        # Stream start events so parsing stops as soon as the message type is known;
+        # iterparse still builds the tree, so the root is cleared as elements arrive
+        events = ET.iterparse(io.StringIO(xml_content), events=("start",))
+        _, root = next(events)
         
         # Remove namespace for easier matching
-        tag = root.tag.split('}')[-1] if '}' in root.tag else root.tag
+        tag = root.tag.rpartition('}')[2]
         
-        # Check for transport_orders
-        if tag == 'transport_orders' or root.find('.//*[contains(local-name(), "transport_order")]') is not None:
-            return {
-                "message_type": "transport_orders",
-                "endpoint_path": "/v2/transport_orders"
-            }
+        # Check for transport_orders, as root or as a nested transport order element
+        if tag == 'transport_orders':
+            return _TRANSPORT_ORDERS_ANALYSIS.copy()
+        
+        for _, element in events:
+            if 'transport_order' in element.tag.rpartition('}')[2]:
+                return _TRANSPORT_ORDERS_ANALYSIS.copy()
+            root.clear()
         
         # Future message types can be added here
         # Example:
@@ -537,8 +624,17 @@ def send_xml_to_transporeon_api(
                 "error_message": "XML content cannot be empty"
             }
         
+        # Reject batches the API would answer with 413, without parsing or sending them
+        batch_size = sum(1 for _ in islice(_TRANSPORT_ORDER_TAG_RE.finditer(xml_content), _MAX_BATCH_SIZE + 1))
+        if batch_size > _MAX_BATCH_SIZE:
+            return {
+                "success": False,
+                "error_type": "batch_size_exceeded",
+                "error_message": f"Batch size limit exceeded: more than {_MAX_BATCH_SIZE} transport orders in one request"
+            }
+        
         # Step 2: Analyze XML content to determine endpoint
-        print("🔍 Analyzing XML content to determine endpoint...")
+        logger.debug("Analyzing XML content to determine endpoint")
         analysis = _analyze_xml_content(xml_content)
         
         if analysis.get("message_type") == "error":
@@ -559,11 +655,11 @@ def send_xml_to_transporeon_api(
         
         message_type = analysis["message_type"]
         endpoint_path = analysis["endpoint_path"]
-        print(f"✅ Detected message type: {message_type} -> {endpoint_path}")
+        logger.debug("Detected message type: %s -> %s", message_type, endpoint_path)
         
         # Step 3: Handle credentials - call get_user_credentials if needed
         if not credentials or not credentials.strip():
-            print("🔑 No credentials provided, collecting user credentials...")
+            logger.debug("No credentials provided, collecting user credentials")
             
             # If individual credentials are provided, use them
             if username and company_id and password:
@@ -576,7 +672,7 @@ def send_xml_to_transporeon_api(
                         "analysis": analysis
                     }
                 credentials = cred_result.get("credentials")
-                print(f"✅ Credentials automatically formatted: {credentials.split(':')[0]}:***")
+                logger.debug("Credentials automatically formatted for %s", credentials.partition(':')[0])
             else:
                 # No credentials provided at all
                 return {
@@ -588,15 +684,11 @@ def send_xml_to_transporeon_api(
                     "analysis": analysis
                 }
         else:
-            print(f"✅ Pre-formatted credentials provided: {credentials.split(':')[0]}:***")
+            logger.debug("Pre-formatted credentials provided for %s", credentials.partition(':')[0])
         
         # Step 4: Determine API base URL
-        base_urls = {
-            "test": "https://xch.test.transporeon.com/openapi",
-            "production": "https://xch.transporeon.com/openapi"
-        }
-        
-        if environment not in base_urls:
+        base_url = _BASE_URLS.get(environment)
+        if base_url is None:
             return {
                 "success": False,
                 "error_type": "invalid_environment",
@@ -604,12 +696,11 @@ def send_xml_to_transporeon_api(
                 "analysis": analysis
             }
         
-        base_url = base_urls[environment]
         endpoint = f"{base_url}{endpoint_path}"
         
         # Step 5: Prepare authentication header
         try:
-            encoded_credentials = base64.b64encode(credentials.encode()).decode()
+            encoded_credentials = _encode_basic_credentials(credentials)
         except Exception as e:
             return {
                 "success": False,
@@ -618,21 +709,19 @@ def send_xml_to_transporeon_api(
                 "analysis": analysis
             }
         
+        # Encode once; requests sets Content-Length from the bytes payload
+        payload = xml_content.encode("utf-8")
+        
         # Step 6: Prepare headers
-        headers = {
-            'Authorization': f'Basic {encoded_credentials}',
-            'Content-Type': 'application/xml',
-            'Accept': 'application/xml'
-        }
+        headers = {**_BASE_HEADERS, 'Authorization': f'Basic {encoded_credentials}'}
         
         # Step 7: Make API request
         try:
-            print(f"🚀 Sending {message_type} XML to {environment} environment...")
-            print(f"📍 Endpoint: {endpoint}")
+            logger.debug("Sending %s XML to %s environment at %s", message_type, environment, endpoint)
             
-            response = requests.post(
+            response = _http_session.post(
                 endpoint,
-                data=xml_content,
+                data=payload,
                 headers=headers,
                 timeout=30
             )
@@ -640,25 +729,40 @@ def send_xml_to_transporeon_api(
             # Step 8: Process response
             api_success = response.status_code == 202  # Expected success code for async processing
             
+            # Decode the full body only for failures; an accepted request needs at most a preview
+            if api_success:
+                preview = response.content[:_SUCCESS_CONTENT_PREVIEW]
+                try:
+                    content = preview.decode(response.encoding or "utf-8", errors="replace")
+                except LookupError:
+                    # Unknown charset in the response headers
+                    content = preview.decode("utf-8", errors="replace")
+            else:
+                content = response.text
+            
             result = {
                 "success": api_success,
                 "analysis": analysis,
                 "api_response": {
                     "status_code": response.status_code,
                     "status_text": response.reason,
-                    "headers": dict(response.headers),
-                    "content": response.text,
+                    "headers": {
+                        key: response.headers[key]
+                        for key in _RESPONSE_HEADER_KEYS
+                        if key in response.headers
+                    },
+                    "content": content,
                     "environment": environment,
                     "endpoint": endpoint,
                     "expected_success_code": 202
                 },
                 "credentials_used": credentials.split(':')[0],  # Just show username@company part
-                "xml_sent_length": len(xml_content)
+                "xml_sent_length": len(payload)
             }
             
             if api_success:
                 result["message"] = f"✅ {message_type} successfully posted to {endpoint_path} endpoint (HTTP {response.status_code})"
-                print(result["message"])
+                logger.info("%s posted to %s (HTTP %s)", message_type, endpoint, response.status_code)
             else:
                 result["error_type"] = "api_request_failed"
                 result["error_message"] = f"API request failed with status {response.status_code}: {response.reason}"
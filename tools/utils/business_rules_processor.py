@@ -3,16 +3,100 @@ Business Rules Processor for Transport Orders.
 Implements business rules defined in transport_parameters.json
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
+
+# Condition predicates by operator name, called with the collected data and the condition field
+_CONDITION_OPERATORS: Dict[str, Callable[[Dict[str, Any], str], bool]] = {
+    "has_value": lambda data, field: bool(data.get(field))
+}
+
+
+# Rule compilers return None for rules that can never change the collected data,
+# so incomplete and unhandled rules are dropped once instead of checked per order
+
+def _compile_generic_rule(rule: Dict[str, Any]) -> None:
+    """Drop a rule without a dedicated handler."""
+    # Generic rule processing can be added here
+    return None
+
+
+def _compile_field_mapping_rule(rule: Dict[str, Any]) -> Optional[Tuple[str, Tuple[str, ...]]]:
+    """Extract the target field and source field patterns of a field mapping rule."""
+    target_field = rule.get("action", {}).get("target_field")
+    if not target_field:
+        return None
+    
+    return target_field, tuple(rule.get("condition", {}).get("field_patterns", []))
+
+
+def _compile_status_rule(rule: Dict[str, Any]) -> Optional[Tuple[str, str, Callable, str, Any]]:
+    """Extract the condition field, operator and predicate, action field and action value of a status rule."""
+    condition = rule.get("condition", {})
+    action = rule.get("action", {})
+    condition_field = condition.get("field")
+    condition_operator = condition.get("operator")
+    action_field = action.get("field")
+    action_value = action.get("value")
+    
+    if not (condition_field and condition_operator and action_field and action_value):
+        return None
+    
+    # Unknown operators never match
+    predicate = _CONDITION_OPERATORS.get(condition_operator)
+    if predicate is None:
+        return None
+    
+    return condition_field, condition_operator, predicate, action_field, action_value
+
 
 class BusinessRulesProcessor:
     """Processes and applies business rules to transport order data."""
     
+    __slots__ = ("template_loader", "_rules_source", "_rules_by_type")
+    
     def __init__(self, template_loader):
         """Initialize with template loader to access business rules."""
         self.template_loader = template_loader
+        self._rules_source: Optional[List[Dict[str, Any]]] = None
+        self._rules_by_type: Dict[str, Tuple[Tuple[Callable, Any], ...]] = {}
+        
+    def _get_rules(self, transport_type: str) -> Tuple[Tuple[Callable, Any], ...]:
+        """Get (handler, compiled rule) pairs applying to a transport type, sorted by priority."""
+        business_rules = self.template_loader.load_parameters("transport").get("business_rules", [])
+        
+        # Rebuild when the template loader has reloaded its parameters
+        if business_rules is not self._rules_source:
+            self._rules_source = business_rules
+            self._rules_by_type = {}
+        
+        rules = self._rules_by_type.get(transport_type)
+        if rules is None:
+            # Higher priority = later execution
+            sorted_rules = sorted(
+                (rule for rule in business_rules if transport_type in rule.get("applies_to", [])),
+                key=lambda x: x.get("priority", 0)
+            )
+            compiled_rules = []
+            for rule in sorted_rules:
+                compile_rule, handler = self._RULE_HANDLERS.get(rule.get("id", "unknown"), self._GENERIC_RULE_HANDLER)
+                compiled = compile_rule(rule)
+                if compiled is not None:
+                    compiled_rules.append((handler, compiled))
+            
+            rules = tuple(compiled_rules)
+            self._rules_by_type[transport_type] = rules
+        
+        return rules
+        
+    def clear_cache(self) -> None:
+        """Clear the cached per transport type rules."""
+        self._rules_source = None
+        self._rules_by_type = {}
         
     def apply_business_rules(self, transport_type: str, user_input: Dict[str, Any], collected_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -26,91 +110,64 @@ class BusinessRulesProcessor:
         Returns:
             Modified collected_data with business rules applied
         """
-        # Get business rules from the top level of transport parameters file
-        all_transport_params = self.template_loader.load_parameters("transport")
-        business_rules = all_transport_params.get("business_rules", [])
+        # Rules from the top level of transport parameters file, already filtered and sorted by priority
+        rules = self._get_rules(transport_type)
+        if not rules:
+            return collected_data
         
-        # Create a working copy of collected data
+        # Create the single working copy of collected data; rule handlers update it in place
         result = collected_data.copy()
         
-        # Sort rules by priority (if specified), process mapping rules first (higher priority = later execution)
-        sorted_rules = sorted(business_rules, key=lambda x: x.get("priority", 0))
-        
-        for rule in sorted_rules:
-            if transport_type not in rule.get("applies_to", []):
-                continue
-                
-            result = self._apply_single_rule(rule, user_input, result)
+        for handler, rule in rules:
+            result = handler(self, rule, user_input, result)
             
         return result
         
-    def _apply_single_rule(self, rule: Dict[str, Any], user_input: Dict[str, Any], collected_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Apply a single business rule."""
-        rule_id = rule.get("id", "unknown")
-        
-        if rule_id == "carrier_id_mapping_rule":
-            return self._apply_field_mapping_rule(rule, user_input, collected_data)
-        elif rule_id == "carrier_creditor_status_rule":
-            return self._apply_status_rule(rule, user_input, collected_data)
-        else:
-            # Generic rule processing can be added here
-            return collected_data
-            
-    def _apply_field_mapping_rule(self, rule: Dict[str, Any], user_input: Dict[str, Any], collected_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _apply_field_mapping_rule(self, rule: Tuple[str, Tuple[str, ...]], user_input: Dict[str, Any], collected_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Apply field mapping rule - maps alternative field names to standard field names.
         Example: carrier_id -> carrier_creditor_number
         """
-        result = collected_data.copy()
-        condition = rule.get("condition", {})
-        action = rule.get("action", {})
-        
-        field_patterns = condition.get("field_patterns", [])
-        target_field = action.get("target_field")
+        result = collected_data
+        target_field, field_patterns = rule
         
-        if not target_field:
-            return result
-            
         # Check if target field is already set
-        if target_field in result and result[target_field]:
+        if result.get(target_field):
             # Target field already has a value, don't override
             return result
             
         # Look for any of the pattern fields in user input
         for pattern in field_patterns:
-            if pattern in user_input and user_input[pattern]:
+            value = user_input.get(pattern)
+            if value:
                 # Map the field value
-                result[target_field] = user_input[pattern]
-                print(f"Applied field mapping rule: {pattern} -> {target_field} = {user_input[pattern]}")
+                result[target_field] = value
+                logger.debug("Applied field mapping rule: %s -> %s = %s", pattern, target_field, value)
                 break
                 
         return result
         
-    def _apply_status_rule(self, rule: Dict[str, Any], user_input: Dict[str, Any], collected_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _apply_status_rule(self, rule: Tuple[str, str, Callable, str, Any], user_input: Dict[str, Any], collected_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Apply status rule - if carrier_creditor_number has value then status is NTO.
         """
-        result = collected_data.copy()
-        condition = rule.get("condition", {})
-        action = rule.get("action", {})
+        result = collected_data
+        condition_field, condition_operator, predicate, action_field, action_value = rule
         
-        condition_field = condition.get("field")
-        condition_operator = condition.get("operator")
-        action_field = action.get("field")
-        action_value = action.get("value")
-        
-        if not all([condition_field, condition_operator, action_field, action_value]):
-            return result
+        # Check condition with the predicate resolved at compile time
+        if predicate(result, condition_field):
+            result[action_field] = action_value
+            logger.debug("Applied status rule: %s %s -> %s = %s", condition_field, condition_operator, action_field, action_value)
             
-        # Check condition
-        if condition_operator == "has_value":
-            if condition_field in result and result[condition_field]:
-                # Condition met: field has a value
-                result[action_field] = action_value
-                print(f"Applied status rule: {condition_field} has value -> {action_field} = {action_value}")
-                
         return result
         
+    # (compile, apply) handlers by rule id; rules are compiled once when the per type rules are cached
+    _RULE_HANDLERS: Dict[str, Tuple[Callable, Callable]] = {
+        "carrier_id_mapping_rule": (_compile_field_mapping_rule, _apply_field_mapping_rule),
+        "carrier_creditor_status_rule": (_compile_status_rule, _apply_status_rule)
+    }
+    _GENERIC_RULE_HANDLER: Tuple[Callable, Optional[Callable]] = (_compile_generic_rule, None)
+        
     def get_business_rules_summary(self, transport_type: str) -> List[Dict[str, str]]:
         """Get a summary of business rules for a transport type."""
         all_transport_params = self.template_loader.load_parameters("transport")
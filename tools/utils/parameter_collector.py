@@ -2,138 +2,165 @@
 Smart parameter collection utility for context-aware user input collection.
 """
 
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple, Union
 import re
 from datetime import datetime
 from .business_rules_processor import BusinessRulesProcessor
 
+# ISO datetime pattern checked for every stop date, compiled once
+_ISO_DATETIME_RE = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}([+-]\d{2}:\d{2}|Z)$')
+
+# Required and optional fields of stop locations, stop date time periods and order items
+_LOCATION_REQUIRED_FIELDS = ("company_name", "city", "country")
+_LOCATION_OPTIONAL_FIELDS = ("street", "zip", "state", "comment")
+_DATE_TIME_PERIOD_FIELDS = ("start", "end")
+_ITEM_REQUIRED_FIELDS = ("number", "short_description", "material_number")
+
+
+def _is_country_code(value: str) -> bool:
+    """Check for exactly 2 uppercase ASCII letters."""
+    return len(value) == 2 and value.isascii() and value.isalpha() and value.isupper()
+
+
+def _is_scac_code(value: str) -> bool:
+    """Check for exactly 4 uppercase ASCII letters or digits."""
+    return len(value) == 4 and value.isascii() and value.isalnum() and value == value.upper()
+
+
+# Marker for field definitions without a default value
+_NO_DEFAULT = object()
+
 
 class ParameterCollector:
     """Collects and processes user input parameters for transport orders."""
     
+    __slots__ = (
+        "template_loader", "business_rules_processor", "_field_plans", "_required_field_prompts",
+        "_optional_field_suggestions"
+    )
+    
     def __init__(self, template_loader):
         """Initialize parameter collector with template loader."""
         self.template_loader = template_loader
         self.business_rules_processor = BusinessRulesProcessor(template_loader)
+        self._field_plans: Dict[str, Dict[str, Any]] = {}
+        self._required_field_prompts: Dict[str, Tuple[FrozenSet[str], Tuple[Tuple[str, str], ...]]] = {}
+        self._optional_field_suggestions: Dict[str, Tuple[str, ...]] = {}
+    
+    def collect_all(self, transport_type: str, user_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Collect transport info, order details, stops and custom parameters in one call."""
+        plan = self._get_field_plan(transport_type)
+        transport_info = dict(plan["transport_fixed"])
+        order_details = dict(plan["order_fixed"])
+        sections = {"transport": transport_info, "order": order_details}
+        
+        # Transport and order fields are resolved in a single walk over the plan
+        for section, field_name, required, default, error_message in plan["fields"]:
+            value = user_input.get(field_name, default)
+            if value is not _NO_DEFAULT:
+                sections[section][field_name] = value
+            elif required:
+                raise ValueError(error_message)
+        
+        return {
+            "transport_info": self.business_rules_processor.apply_business_rules(
+                transport_type, user_input, transport_info
+            ),
+            "order_details": order_details,
+            "stops": self.collect_stops(user_input),
+            "custom_parameters": self.collect_custom_parameters(user_input)
+        }
     
-    def collect_basic_transport_info(self, transport_type: str, user_input: Dict[str, Any]) -> Dict[str, Any]:
-        """Collect basic transport order information."""
+    def _get_field_plan(self, transport_type: str) -> Dict[str, Any]:
+        """Get the cached transport and order field plan for a transport type."""
+        plan = self._field_plans.get(transport_type)
+        if plan is not None:
+            return plan
+        
         transport_params = self.template_loader.get_transport_parameters(transport_type)
         fixed_params = self.template_loader.get_fixed_parameters(transport_type)
+        order_params = self.template_loader.get_order_parameters(transport_type)
         
-        result = {}
+        fields = []
         
-        # Apply fixed values first
-        if "fixed_values" in fixed_params:
-            result.update(fixed_params["fixed_values"])
+        # Transport fields fall back to their defaults
+        for field in transport_params.get("required_fields", []):
+            fields.append((
+                "transport", field["name"], True, field.get("default", _NO_DEFAULT),
+                f"Required field '{field['name']}' not provided for {transport_type}"
+            ))
         
-        # Collect required fields
-        if "required_fields" in transport_params:
-            for field in transport_params["required_fields"]:
-                field_name = field["name"]
-                
-                if field_name in user_input:
-                    result[field_name] = user_input[field_name]
-                elif "default" in field:
-                    result[field_name] = field["default"]
-                else:
-                    # Field is required but not provided
-                    raise ValueError(f"Required field '{field_name}' not provided for {transport_type}")
-        
-        # Collect optional fields if provided
-        if "optional_fields" in transport_params:
-            for field in transport_params["optional_fields"]:
-                field_name = field["name"]
-                
-                if field_name in user_input:
-                    result[field_name] = user_input[field_name]
-                elif "default" in field:
-                    result[field_name] = field["default"]
+        for field in transport_params.get("optional_fields", []):
+            fields.append(("transport", field["name"], False, field.get("default", _NO_DEFAULT), None))
         
-        # Apply business rules
-        result = self.business_rules_processor.apply_business_rules(transport_type, user_input, result)
+        # Order fields are only taken from user input
+        for field in order_params.get("required_fields", []):
+            fields.append((
+                "order", field["name"], True, _NO_DEFAULT,
+                f"Required order field '{field['name']}' not provided"
+            ))
         
-        return result
-    
-    def collect_order_details(self, transport_type: str, user_input: Dict[str, Any]) -> Dict[str, Any]:
-        """Collect order details information."""
-        order_params = self.template_loader.get_order_parameters(transport_type)
-        result = {}
+        for field in order_params.get("optional_fields", []):
+            fields.append(("order", field["name"], False, _NO_DEFAULT, None))
         
-        # Apply fixed values for orders
-        if "fixed_values" in order_params:
-            result.update(order_params["fixed_values"])
+        plan = {
+            "transport_fixed": fixed_params.get("fixed_values", {}),
+            "order_fixed": order_params.get("fixed_values", {}),
+            "fields": tuple(fields)
+        }
+        self._field_plans[transport_type] = plan
         
-        # Collect required order fields
-        if "required_fields" in order_params:
-            for field in order_params["required_fields"]:
-                field_name = field["name"]
-                
-                if field_name in user_input:
-                    result[field_name] = user_input[field_name]
-                else:
-                    raise ValueError(f"Required order field '{field_name}' not provided")
-        
-        # Collect optional order fields
-        if "optional_fields" in order_params:
-            for field in order_params["optional_fields"]:
-                field_name = field["name"]
-                
-                if field_name in user_input:
-                    result[field_name] = user_input[field_name]
-        
-        return result
+        return plan
     
     def collect_stops(self, user_input: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Collect stop information."""
         stops = user_input.get("stops", [])
-        processed_stops = []
+        process_location = self._process_location
+        process_date_time_period = self._process_date_time_period
         
-        for i, stop_data in enumerate(stops):
-            processed_stop = {
+        # Stops are validated in order, location before dates, so the first error raised is unchanged
+        return [
+            {
                 "id": stop_data.get("id", f"stop_{i+1}"),
                 "index": stop_data.get("index", i),
-                "location": self._process_location(stop_data.get("location", {})),
-                "date_time_period": self._process_date_time_period(stop_data.get("date_time_period", {}))
+                "location": process_location(stop_data.get("location", {})),
+                "date_time_period": process_date_time_period(stop_data.get("date_time_period", {}))
             }
-            processed_stops.append(processed_stop)
-        
-        return processed_stops
+            for i, stop_data in enumerate(stops)
+        ]
     
     def _process_location(self, location_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process and validate location data."""
-        required_fields = ["company_name", "city", "country"]
         processed = {}
         
-        for field in required_fields:
+        for field in _LOCATION_REQUIRED_FIELDS:
             if field not in location_data or not location_data[field]:
                 raise ValueError(f"Required location field '{field}' is missing")
             processed[field] = location_data[field]
         
         # Add optional fields
-        optional_fields = ["street", "zip", "state", "comment"]
-        for field in optional_fields:
-            if field in location_data and location_data[field]:
-                processed[field] = location_data[field]
+        for field in _LOCATION_OPTIONAL_FIELDS:
+            value = location_data.get(field)
+            if value:
+                processed[field] = value
         
         # Validate country code format
-        if not re.match(r'^[A-Z]{2}$', processed["country"]):
+        if not _is_country_code(processed["country"]):
             raise ValueError(f"Country code must be 2 uppercase letters, got: {processed['country']}")
         
         return processed
     
     def _process_date_time_period(self, period_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process and validate date time period data."""
-        required_fields = ["start", "end"]
         processed = {}
         
-        for field in required_fields:
+        for field in _DATE_TIME_PERIOD_FIELDS:
             if field not in period_data:
                 raise ValueError(f"Required date field '{field}' is missing")
             
-            # Validate ISO datetime format
+            # Validate ISO datetime format against the precompiled pattern
             datetime_str = period_data[field]
-            if not self._validate_iso_datetime(datetime_str):
+            if not _ISO_DATETIME_RE.match(datetime_str):
                 raise ValueError(f"Invalid datetime format for '{field}': {datetime_str}")
             
             processed[field] = datetime_str
@@ -144,11 +171,6 @@ class ParameterCollector:
         
         return processed
     
-    def _validate_iso_datetime(self, datetime_str: str) -> bool:
-        """Validate ISO 8601 datetime format."""
-        iso_pattern = r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}([+-]\d{2}:\d{2}|Z)$'
-        return bool(re.match(iso_pattern, datetime_str))
-    
     def collect_ocean_parameters(self, user_input: Dict[str, Any]) -> Dict[str, Any]:
         """Collect ocean-specific parameters."""
         ocean_params = self.template_loader.get_transport_parameters("ocean_visibility")
@@ -168,7 +190,7 @@ class ParameterCollector:
                 
                 # Validate SCAC code format
                 if param_name == "ocean.scac.no":
-                    if not re.match(r'^[A-Z0-9]{4}$', value):
+                    if not _is_scac_code(value):
                         raise ValueError(f"SCAC code must be 4 alphanumeric characters: {value}")
                 
                 result[param_name] = value
@@ -193,8 +215,7 @@ class ParameterCollector:
             }
             
             # Validate required fields
-            required_fields = ["number", "short_description", "material_number"]
-            for field in required_fields:
+            for field in _ITEM_REQUIRED_FIELDS:
                 if not processed_item[field]:
                     raise ValueError(f"Required item field '{field}' is missing")
             
@@ -264,54 +285,63 @@ class ParameterCollector:
     
     def generate_missing_field_prompts(self, transport_type: str, provided_data: Dict[str, Any]) -> List[str]:
         """Generate prompts for missing required fields."""
-        prompts = []
+        required_names, field_prompts = self._get_required_field_prompts(transport_type)
+        
+        # One set difference settles the common case where nothing is missing
+        missing = required_names - provided_data.keys()
+        if not missing:
+            return []
+        
+        return [prompt for field_name, prompt in field_prompts if field_name in missing]
+    
+    def _get_required_field_prompts(self, transport_type: str) -> Tuple[FrozenSet[str], Tuple[Tuple[str, str], ...]]:
+        """Get the cached required field names and (field name, prompt) pairs for a transport type."""
+        field_prompts = self._required_field_prompts.get(transport_type)
+        if field_prompts is not None:
+            return field_prompts
         
-        # Check transport-level required fields
+        required_fields = []
+        
+        # Transport-level and order-level required fields
         transport_params = self.template_loader.get_transport_parameters(transport_type)
-        if "required_fields" in transport_params:
-            for field in transport_params["required_fields"]:
-                field_name = field["name"]
-                if field_name not in provided_data:
-                    prompt = f"Please provide {field['description']} ({field_name})"
-                    if "example" in field:
-                        prompt += f" - Example: {field['example']}"
-                    prompts.append(prompt)
-        
-        # Check order-level required fields
         order_params = self.template_loader.get_order_parameters(transport_type)
-        if "required_fields" in order_params:
-            for field in order_params["required_fields"]:
-                field_name = field["name"]
-                if field_name not in provided_data:
-                    prompt = f"Please provide {field['description']} ({field_name})"
-                    if "example" in field:
-                        prompt += f" - Example: {field['example']}"
-                    prompts.append(prompt)
-        
-        # Check ocean-specific parameters
+        required_fields.extend(transport_params.get("required_fields", []))
+        required_fields.extend(order_params.get("required_fields", []))
+        
+        # Ocean-specific parameters
         if transport_type == "ocean_visibility":
             ocean_params = self.template_loader.get_transport_parameters("ocean_visibility")
-            if "ocean_parameters" in ocean_params:
-                for param in ocean_params["ocean_parameters"]:
-                    param_name = param["name"]
-                    if param.get("required", False) and param_name not in provided_data:
-                        prompt = f"Please provide {param['description']} ({param_name})"
-                        if "example" in param:
-                            prompt += f" - Example: {param['example']}"
-                        prompts.append(prompt)
-        
-        return prompts
+            required_fields.extend(
+                param for param in ocean_params.get("ocean_parameters", []) if param.get("required", False)
+            )
+        
+        field_prompts = []
+        for field in required_fields:
+            field_name = field["name"]
+            prompt = f"Please provide {field['description']} ({field_name})"
+            if "example" in field:
+                prompt += f" - Example: {field['example']}"
+            field_prompts.append((field_name, prompt))
+        
+        field_prompts = (frozenset(name for name, _ in field_prompts), tuple(field_prompts))
+        self._required_field_prompts[transport_type] = field_prompts
+        
+        return field_prompts
     
     def suggest_optional_fields(self, transport_type: str) -> List[str]:
         """Generate suggestions for optional fields that might be useful."""
-        suggestions = []
-        
-        transport_params = self.template_loader.get_transport_parameters(transport_type)
-        if "optional_fields" in transport_params:
-            for field in transport_params["optional_fields"]:
+        suggestions = self._optional_field_suggestions.get(transport_type)
+        if suggestions is None:
+            # Suggestions depend only on the transport type, so they are formatted once
+            suggestions = []
+            transport_params = self.template_loader.get_transport_parameters(transport_type)
+            for field in transport_params.get("optional_fields", []):
                 suggestion = f"Optional: {field['description']} ({field['name']})"
                 if "example" in field:
                     suggestion += f" - Example: {field['example']}"
                 suggestions.append(suggestion)
+            
+            suggestions = tuple(suggestions)
+            self._optional_field_suggestions[transport_type] = suggestions
         
-        return suggestions
+        return list(suggestions)
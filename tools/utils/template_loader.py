@@ -3,14 +3,24 @@ Template loader utility for loading and caching XML templates.
 """
 
 import os
+import re
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, FrozenSet, Optional, Tuple
 from pathlib import Path
 
+# Matches {placeholder} names in XML templates
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
 
 class TemplateLoader:
     """Loads and caches XML templates and parameter configurations."""
     
+    __slots__ = (
+        "data_path", "_templates_dir", "_parameters_dir", "_validation_dir", "_examples_dir",
+        "_template_cache", "_compiled_template_cache", "_template_keys_cache", "_parameter_cache",
+        "_validation_cache", "_section_cache", "_transport_types_cache", "_templates_mtime"
+    )
+    
     def __init__(self, data_path: Optional[str] = None):
         """Initialize template loader with data directory path."""
         if data_path is None:
@@ -19,9 +29,18 @@ class TemplateLoader:
             data_path = current_dir / "data"
         
         self.data_path = Path(data_path)
+        self._templates_dir = self.data_path / "templates"
+        self._parameters_dir = self.data_path / "parameters"
+        self._validation_dir = self.data_path / "validation"
+        self._examples_dir = self.data_path / "examples"
         self._template_cache: Dict[str, str] = {}
+        self._compiled_template_cache: Dict[str, Tuple[str, ...]] = {}
+        self._template_keys_cache: Dict[str, FrozenSet[str]] = {}
         self._parameter_cache: Dict[str, Dict[str, Any]] = {}
         self._validation_cache: Dict[str, Dict[str, Any]] = {}
+        self._section_cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._transport_types_cache: Optional[list] = None
+        self._templates_mtime: Optional[float] = None
         
         # Validate data directory exists
         if not self.data_path.exists():
@@ -31,7 +50,7 @@ class TemplateLoader:
     
     def _validate_templates_on_startup(self) -> None:
         """Pre-validate templates at startup to catch errors early."""
-        templates_dir = self.data_path / "templates"
+        templates_dir = self._templates_dir
         if not templates_dir.exists():
             raise FileNotFoundError(f"Templates directory not found: {templates_dir}")
         
@@ -44,28 +63,48 @@ class TemplateLoader:
     def load_template(self, transport_type: str) -> str:
         """Load XML template for the specified transport type."""
         if transport_type not in self._template_cache:
-            template_path = self.data_path / "templates" / f"{transport_type}.xml"
+            template_path = self._templates_dir / f"{transport_type}.xml"
             
             if not template_path.exists():
                 raise FileNotFoundError(f"Template not found: {template_path}")
             
-            with open(template_path, 'r', encoding='utf-8') as f:
-                self._template_cache[transport_type] = f.read()
+            self._template_cache[transport_type] = template_path.read_text(encoding='utf-8')
         
         return self._template_cache[transport_type]
     
+    def load_compiled_template(self, transport_type: str) -> Tuple[str, ...]:
+        """
+        Load XML template split into literal and placeholder segments.
+        
+        Even indices hold literal text and odd indices hold placeholder names,
+        so templates are scanned for placeholders once instead of per request.
+        """
+        if transport_type not in self._compiled_template_cache:
+            template = self.load_template(transport_type)
+            self._compiled_template_cache[transport_type] = tuple(_PLACEHOLDER_RE.split(template))
+        
+        return self._compiled_template_cache[transport_type]
+    
+    def load_template_keys(self, transport_type: str) -> FrozenSet[str]:
+        """Load the set of placeholder names used by the XML template."""
+        if transport_type not in self._template_keys_cache:
+            segments = self.load_compiled_template(transport_type)
+            self._template_keys_cache[transport_type] = frozenset(segments[1::2])
+        
+        return self._template_keys_cache[transport_type]
+    
     def load_parameters(self, parameter_type: str) -> Dict[str, Any]:
         """Load parameter configuration for the specified type."""
         cache_key = f"parameters_{parameter_type}"
         
         if cache_key not in self._parameter_cache:
-            param_path = self.data_path / "parameters" / f"{parameter_type}_parameters.json"
+            param_path = self._parameters_dir / f"{parameter_type}_parameters.json"
             
             if not param_path.exists():
                 raise FileNotFoundError(f"Parameter file not found: {param_path}")
             
-            with open(param_path, 'r', encoding='utf-8') as f:
-                self._parameter_cache[cache_key] = json.load(f)
+            # json decodes UTF-8 bytes directly, without an intermediate str
+            self._parameter_cache[cache_key] = json.loads(param_path.read_bytes())
         
         return self._parameter_cache[cache_key]
     
@@ -74,59 +113,74 @@ class TemplateLoader:
         cache_key = f"validation_{validation_type}"
         
         if cache_key not in self._validation_cache:
-            validation_path = self.data_path / "validation" / f"{validation_type}_rules.json"
+            validation_path = self._validation_dir / f"{validation_type}_rules.json"
             
             if not validation_path.exists():
                 raise FileNotFoundError(f"Validation file not found: {validation_path}")
             
-            with open(validation_path, 'r', encoding='utf-8') as f:
-                self._validation_cache[cache_key] = json.load(f)
+            self._validation_cache[cache_key] = json.loads(validation_path.read_bytes())
         
         return self._validation_cache[cache_key]
     
+    def _get_parameter_section(self, parameter_type: str, transport_type: str) -> Dict[str, Any]:
+        """Get the cached section of a parameter configuration for a transport type."""
+        cache_key = (parameter_type, transport_type)
+        section = self._section_cache.get(cache_key)
+        if section is None:
+            section = self.load_parameters(parameter_type).get(transport_type, {})
+            self._section_cache[cache_key] = section
+        
+        return section
+    
     def get_transport_parameters(self, transport_type: str) -> Dict[str, Any]:
         """Get transport-specific parameter definitions."""
-        transport_params = self.load_parameters("transport")
-        return transport_params.get(transport_type, {})
+        return self._get_parameter_section("transport", transport_type)
     
     def get_order_parameters(self, transport_type: str) -> Dict[str, Any]:
         """Get order-specific parameter definitions."""
-        order_params = self.load_parameters("order")
-        return order_params.get(transport_type, {})
+        return self._get_parameter_section("order", transport_type)
     
     def get_fixed_parameters(self, transport_type: str) -> Dict[str, Any]:
         """Get fixed parameter definitions."""
-        fixed_params = self.load_parameters("fixed")
-        return fixed_params.get(transport_type, {})
+        return self._get_parameter_section("fixed", transport_type)
     
     def get_item_parameters(self, transport_type: str) -> Dict[str, Any]:
         """Get item-specific parameter definitions."""
-        item_params = self.load_parameters("item")
-        return item_params.get(transport_type, {})
+        return self._get_parameter_section("item", transport_type)
     
     def load_example(self, transport_type: str) -> str:
         """Load example XML for the specified transport type."""
-        example_path = self.data_path / "examples" / f"{transport_type}_example.xml"
+        example_path = self._examples_dir / f"{transport_type}_example.xml"
         
         if not example_path.exists():
             raise FileNotFoundError(f"Example file not found: {example_path}")
         
-        with open(example_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return example_path.read_text(encoding='utf-8')
     
     def clear_cache(self) -> None:
         """Clear all cached templates and parameters."""
         self._template_cache.clear()
+        self._compiled_template_cache.clear()
+        self._template_keys_cache.clear()
         self._parameter_cache.clear()
+        self._section_cache.clear()
         self._validation_cache.clear()
+        self._transport_types_cache = None
+        self._templates_mtime = None
     
     def get_available_transport_types(self) -> list:
         """Get list of available transport types based on templates."""
-        templates_dir = self.data_path / "templates"
-        transport_types = []
+        templates_dir = self._templates_dir
         
-        for template_file in templates_dir.glob("*.xml"):
-            transport_type = template_file.stem
-            transport_types.append(transport_type)
+        # Rescan only when templates were added or removed since the last call
+        templates_mtime = os.stat(templates_dir).st_mtime
+        if self._transport_types_cache is None or templates_mtime != self._templates_mtime:
+            with os.scandir(templates_dir) as entries:
+                # Same matches as the previous Path.glob("*.xml"), dotfiles and directories included
+                transport_types = [entry.name[:-4] for entry in entries if entry.name.endswith(".xml")]
+            
+            transport_types.sort()
+            self._transport_types_cache = transport_types
+            self._templates_mtime = templates_mtime
         
-        return sorted(transport_types)
+        return list(self._transport_types_cache)
@@ -2,25 +2,74 @@
 XML DOM builder for programmatic XML construction and manipulation.
 """
 
+import copy
 import xml.etree.ElementTree as ET
-from typing import Dict, Any, List, Optional, Union
+from xml.etree.ElementTree import SubElement
+from xml.parsers import expat
+from typing import Dict, Any, List, Optional, Union, Tuple, Pattern
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 import re
 
 
+# Translation table for escaping XML text and double-quoted attribute values
+_XML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+
+def escape_xml(value: Any) -> str:
+    """Escape a value for use as XML text or a double-quoted attribute value."""
+    return str(value).translate(_XML_ESCAPE)
+
+
+# Patterns for leftover placeholders, applied in order by remove_empty_placeholders
+_STANDALONE_LINE_RE = re.compile(r'^\s*\{[^}]*\}\s*$', re.MULTILINE)
+_PLACEHOLDER_ELEMENT_RE = re.compile(r'<([^>]+)>\s*\{[^}]*\}\s*</\1>')
+_PLACEHOLDER_SELF_CLOSING_RE = re.compile(r'<[^>]*\{[^}]*\}[^>]*/>\s*')
+_ANY_PLACEHOLDER_RE = re.compile(r'\{[^}]*\}')
+
+
+# Default namespaces, read-only since every builder shares them
+_DEFAULT_NAMESPACES = MappingProxyType({
+    '': 'http://xch.transporeon.com/soap/',
+    'soap': 'http://xch.transporeon.com/soap/'
+})
+
+# Register namespaces once for the whole process
+for _prefix, _uri in _DEFAULT_NAMESPACES.items():
+    ET.register_namespace(_prefix, _uri)
+
+
+# Sentinel for placeholders without a replacement
+_MISSING = object()
+
+
+@lru_cache(maxsize=64)
+def _placeholder_pattern(placeholders: Tuple[str, ...]) -> Pattern:
+    """Compile a pattern matching any of the given {placeholder} names."""
+    return re.compile(r"\{(" + "|".join(map(re.escape, placeholders)) + r")\}")
+
+
+def _sub_element(parent: ET.Element, tag: str, text: Optional[str] = None, **attrib: str) -> ET.Element:
+    """
+    Add a child element with optional text and attributes.
+    
+    Builder methods create every child through SubElement on its parent, never
+    via a detached Element appended later, so elements always join the tree in place.
+    """
+    element = SubElement(parent, tag, attrib)
+    if text is not None:
+        element.text = text
+    return element
+
+
 class XMLDOMBuilder:
     """Builds and manipulates XML using DOM operations."""
     
-    def __init__(self):
-        """Initialize XML DOM builder."""
-        self.namespaces = {
-            '': 'http://xch.transporeon.com/soap/',
-            'soap': 'http://xch.transporeon.com/soap/'
-        }
-        
-        # Register namespaces
-        for prefix, uri in self.namespaces.items():
-            ET.register_namespace(prefix, uri)
+    __slots__ = ()
+    
+    # Namespaces shared by all builders
+    namespaces = _DEFAULT_NAMESPACES
     
     def create_transport_orders_root(self) -> ET.Element:
         """Create the root transport_orders element with proper namespace."""
@@ -30,27 +79,20 @@ class XMLDOMBuilder:
     
     def create_transport_order_element(self, root: ET.Element) -> ET.Element:
         """Create transport_order element under root."""
-        transport_order = ET.SubElement(root, "transport_order")
-        transport_order.set("xmlns", self.namespaces[''])
-        return transport_order
+        return _sub_element(root, "transport_order", xmlns=self.namespaces[''])
     
     def add_simple_element(self, parent: ET.Element, tag: str, text: str = "") -> ET.Element:
         """Add a simple text element to parent."""
-        element = ET.SubElement(parent, tag)
-        element.text = text
-        return element
+        return _sub_element(parent, tag, text)
     
     def add_weight_element(self, parent: ET.Element, value: float, unit: str = "kg") -> Optional[ET.Element]:
         """Add weight element with value and unit."""
         if value is None:
             return None
         
-        weight = ET.SubElement(parent, "weight")
-        if unit != "kg":  # Only add unit attribute if not default
-            weight.set("unit", unit)
-        
-        value_elem = ET.SubElement(weight, "value")
-        value_elem.text = str(value)
+        # Only add unit attribute if not default
+        weight = _sub_element(parent, "weight") if unit == "kg" else _sub_element(parent, "weight", unit=unit)
+        _sub_element(weight, "value", str(value))
         return weight
     
     def add_volume_element(self, parent: ET.Element, value: float) -> Optional[ET.Element]:
@@ -58,9 +100,8 @@ class XMLDOMBuilder:
         if value is None:
             return None
         
-        volume = ET.SubElement(parent, "volume")
-        value_elem = ET.SubElement(volume, "value")
-        value_elem.text = str(value)
+        volume = _sub_element(parent, "volume")
+        _sub_element(volume, "value", str(value))
         return volume
     
     def add_distance_element(self, parent: ET.Element, value: float, unit: str = "km") -> Optional[ET.Element]:
@@ -68,78 +109,67 @@ class XMLDOMBuilder:
         if value is None:
             return None
         
-        distance = ET.SubElement(parent, "distance")
-        distance.set("unit", unit)
-        
-        value_elem = ET.SubElement(distance, "value")
-        value_elem.text = str(value)
+        distance = _sub_element(parent, "distance", unit=unit)
+        _sub_element(distance, "value", str(value))
         return distance
     
     def add_loading_meter_element(self, parent: ET.Element, value: Optional[float] = None, unit: str = "m") -> ET.Element:
         """Add loading_meter element with optional value and unit."""
-        loading_meter = ET.SubElement(parent, "loading_meter")
-        loading_meter.set("unit", unit)
+        loading_meter = _sub_element(parent, "loading_meter", unit=unit)
         
         if value is not None:
-            value_elem = ET.SubElement(loading_meter, "value")
-            value_elem.text = str(value)
+            _sub_element(loading_meter, "value", str(value))
         
         return loading_meter
     
     def add_prices_element(self, parent: ET.Element, reference: float, currency: str = "EUR", mode: str = "DEFAULT") -> ET.Element:
         """Add prices element with reference, currency, and mode."""
-        prices = ET.SubElement(parent, "prices")
-        
-        ref_elem = ET.SubElement(prices, "reference")
-        ref_elem.text = str(reference)
-        
-        curr_elem = ET.SubElement(prices, "currency")
-        curr_elem.text = currency
-        
-        mode_elem = ET.SubElement(prices, "mode")
-        mode_elem.text = mode
-        
+        prices = _sub_element(parent, "prices")
+        _sub_element(prices, "reference", str(reference))
+        _sub_element(prices, "currency", currency)
+        _sub_element(prices, "mode", mode)
         return prices
     
     def add_stop_ids(self, parent: ET.Element, tag_name: str, stop_ids: List[str]) -> ET.Element:
         """Add loading_stop_ids or unloading_stop_ids elements."""
-        container = ET.SubElement(parent, tag_name)
+        container = _sub_element(parent, tag_name)
         
+        # Convert plural to singular once for all ids
+        id_tag = tag_name.rstrip('s')[:-5] + "_id"
         for stop_id in stop_ids:
-            id_elem = ET.SubElement(container, tag_name.rstrip('s')[:-5] + "_id")  # Convert plural to singular
-            id_elem.text = stop_id
+            _sub_element(container, id_tag, stop_id)
         
         return container
     
     def add_stop_element(self, parent: ET.Element, stop_data: Dict[str, Any]) -> ET.Element:
         """Add a stop element with location and date_time_period."""
-        stop = ET.SubElement(parent, "stop")
+        stop = _sub_element(parent, "stop")
         
         # Add stop ID and index
-        self.add_simple_element(stop, "id", stop_data["id"])
-        self.add_simple_element(stop, "index", str(stop_data.get("index", 0)))
+        _sub_element(stop, "id", stop_data["id"])
+        _sub_element(stop, "index", str(stop_data.get("index", 0)))
         
         # Add location
-        location = ET.SubElement(stop, "location")
+        location = _sub_element(stop, "location")
         location_data = stop_data["location"]
         
-        self.add_simple_element(location, "company_name", location_data["company_name"])
+        _sub_element(location, "company_name", location_data["company_name"])
         
         if location_data.get("street"):
-            self.add_simple_element(location, "street", location_data["street"])
+            _sub_element(location, "street", location_data["street"])
         
         if location_data.get("zip"):
-            self.add_simple_element(location, "zip", location_data["zip"])
+            _sub_element(location, "zip", location_data["zip"])
         
-        self.add_simple_element(location, "city", location_data["city"])
+        _sub_element(location, "city", location_data["city"])
         
         if location_data.get("state"):
-            self.add_simple_element(location, "state", location_data["state"])
+            _sub_element(location, "state", location_data["state"])
         
-        self.add_simple_element(location, "country", location_data["country"])
+        _sub_element(location, "country", location_data["country"])
         
         if location_data.get("comment"):
-            self.add_simple_element(location, "comment", location_data["comment"])
+            _sub_element(location, "comment", location_data["comment"])
         
         # Add date_time_period
         if "date_time_period" in stop_data:
@@ -149,13 +179,13 @@ class XMLDOMBuilder:
     
     def add_date_time_period(self, parent: ET.Element, period_data: Dict[str, str]) -> ET.Element:
         """Add date_time_period element."""
-        period = ET.SubElement(parent, "date_time_period")
+        period = _sub_element(parent, "date_time_period")
         
-        self.add_simple_element(period, "start", period_data["start"])
-        self.add_simple_element(period, "end", period_data["end"])
+        _sub_element(period, "start", period_data["start"])
+        _sub_element(period, "end", period_data["end"])
         
         if period_data.get("timezone"):
-            self.add_simple_element(period, "timezone", period_data["timezone"])
+            _sub_element(period, "timezone", period_data["timezone"])
         
         return period
     
@@ -163,38 +193,38 @@ class XMLDOMBuilder:
                      shipper_visibility: Optional[str] = None, 
                      export_to_carrier: Optional[str] = None) -> ET.Element:
         """Add parameter element with attributes."""
-        param = ET.SubElement(parent, "parameter")
-        param.set("qualifier", qualifier)
+        attrib = {"qualifier": qualifier}
         
         if shipper_visibility:
-            param.set("shipperVisibility", shipper_visibility)
+            attrib["shipperVisibility"] = shipper_visibility
         
         if export_to_carrier:
-            param.set("exportToCarrier", export_to_carrier)
+            attrib["exportToCarrier"] = export_to_carrier
+        
+        param = _sub_element(parent, "parameter", **attrib)
         
         if value:
-            value_elem = ET.SubElement(param, "value")
-            value_elem.text = value
+            _sub_element(param, "value", value)
         
         return param
     
     def add_order_item(self, parent: ET.Element, item_data: Dict[str, Any]) -> ET.Element:
         """Add order_item element with quantities and parameters."""
-        item = ET.SubElement(parent, "order_item")
+        item = _sub_element(parent, "order_item")
         
-        self.add_simple_element(item, "number", item_data["number"])
-        self.add_simple_element(item, "short_description", item_data["short_description"])
-        self.add_simple_element(item, "material_number", item_data["material_number"])
+        _sub_element(item, "number", item_data["number"])
+        _sub_element(item, "short_description", item_data["short_description"])
+        _sub_element(item, "material_number", item_data["material_number"])
         
         # Add quantities
         if "quantities" in item_data:
-            quantities_elem = ET.SubElement(item, "quantities")
+            quantities_elem = _sub_element(item, "quantities")
             for quantity_data in item_data["quantities"]:
                 self.add_quantity(quantities_elem, quantity_data)
         
         # Add parameters
         if "parameters" in item_data:
-            params_elem = ET.SubElement(item, "parameters")
+            params_elem = _sub_element(item, "parameters")
             for param_data in item_data["parameters"]:
                 self.add_parameter(
                     params_elem,
@@ -208,39 +238,59 @@ class XMLDOMBuilder:
     
     def add_quantity(self, parent: ET.Element, quantity_data: Dict[str, Any]) -> ET.Element:
         """Add quantity element."""
-        quantity = ET.SubElement(parent, "quantity")
+        quantity = _sub_element(parent, "quantity")
         
-        self.add_simple_element(quantity, "qualifier", quantity_data["qualifier"])
-        self.add_simple_element(quantity, "value", str(quantity_data["value"]))
+        _sub_element(quantity, "qualifier", quantity_data["qualifier"])
+        _sub_element(quantity, "value", str(quantity_data["value"]))
         
         if quantity_data.get("unit"):
-            self.add_simple_element(quantity, "unit", quantity_data["unit"])
+            _sub_element(quantity, "unit", quantity_data["unit"])
         
         return quantity
     
     def replace_placeholders(self, template: str, replacements: Dict[str, str]) -> str:
-        """Replace placeholders in template with actual values."""
-        result = template
-        
-        for placeholder, value in replacements.items():
-            pattern = f"{{{placeholder}}}"
-            result = result.replace(pattern, str(value))
+        """Replace placeholders in template with actual values in a single pass."""
+        if not replacements:
+            return template
         
-        return result
+        pattern = _placeholder_pattern(tuple(sorted(replacements)))
+        values = {key: value if type(value) is str else str(value) for key, value in replacements.items()}
+        return pattern.sub(lambda match: values[match.group(1)], template)
+    
+    def fill_template(self, segments: Tuple[str, ...], replacements: Dict[str, Any]) -> str:
+        """Fill a pre-split template, keeping placeholders without a replacement."""
+        parts = list(segments)
+        get = replacements.get
+        
+        for i in range(1, len(parts), 2):
+            value = get(parts[i], _MISSING)
+            if value is _MISSING:
+                parts[i] = f"{{{parts[i]}}}"
+            elif type(value) is str:
+                parts[i] = value
+            else:
+                # Numeric values from transport_info are stringified here
+                parts[i] = str(value)
+        
+        return "".join(parts)
     
     def remove_empty_placeholders(self, xml_string: str) -> str:
         """Remove elements that still contain unreplaced placeholders."""
+        # Every pattern needs a brace, so fully filled templates skip all four scans
+        if "{" not in xml_string:
+            return xml_string
+        
         # Remove standalone placeholders on their own lines
-        xml_string = re.sub(r'^\s*\{[^}]*\}\s*$', '', xml_string, flags=re.MULTILINE)
+        xml_string = _STANDALONE_LINE_RE.sub('', xml_string)
         
         # Remove elements that contain only placeholders (single line)
-        xml_string = re.sub(r'<([^>]+)>\s*\{[^}]*\}\s*</\1>', '', xml_string)
+        xml_string = _PLACEHOLDER_ELEMENT_RE.sub('', xml_string)
         
         # Remove self-closing elements with placeholder attributes
-        xml_string = re.sub(r'<[^>]*\{[^}]*\}[^>]*/>\s*', '', xml_string)
+        xml_string = _PLACEHOLDER_SELF_CLOSING_RE.sub('', xml_string)
         
         # Remove any remaining standalone placeholders
-        xml_string = re.sub(r'\{[^}]*\}', '', xml_string)
+        xml_string = _ANY_PLACEHOLDER_RE.sub('', xml_string)
         
         return xml_string
     
@@ -256,24 +306,18 @@ class XMLDOMBuilder:
     
     def validate_xml_structure(self, xml_string: str) -> bool:
         """Validate that XML string is well-formed."""
+        # Parse without building an element tree; only well-formedness matters here
+        parser = expat.ParserCreate(namespace_separator="}")
         try:
-            ET.fromstring(xml_string)
+            parser.Parse(xml_string, True)
             return True
-        except ET.ParseError:
+        except expat.ExpatError:
             return False
     
     def pretty_print_xml(self, element: ET.Element) -> str:
         """Return a pretty-printed XML string."""
-        from xml.dom import minidom
-        
-        rough_string = ET.tostring(element, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        
-        # Get pretty printed string and remove the first line (XML declaration)
-        pretty = reparsed.toprettyxml(indent="    ", encoding=None)
-        lines = pretty.split('\n')
-        
-        # Remove empty lines and the XML declaration line
-        cleaned_lines = [line for line in lines[1:] if line.strip()]
+        # Indent a copy in place instead of reparsing the serialized tree with minidom
+        indented = copy.deepcopy(element)
+        ET.indent(indented, space="    ")
         
-        return '<?xml version="1.0" encoding="UTF-8"?>\n' + '\n'.join(cleaned_lines)
+        return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(indented, encoding='unicode')
@@ -7,6 +7,9 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 import re
 
+# SCAC code format, compiled once
+_SCAC_RE = re.compile(r'^[A-Z0-9]{4}$')
+
 
 class BusinessValidator:
     """Validates business rules and transport-specific logic."""
@@ -18,7 +21,7 @@ class BusinessValidator:
         self.namespace = "http://xch.transporeon.com/soap/"
         self.ns = "{" + self.namespace + "}"
     
-    def validate_transport_type_rules(self, xml_content: str, transport_type: str) -> Dict[str, Any]:
+    def validate_transport_type_rules(self, xml_content: str, transport_type: str, root: Optional[ET.Element] = None) -> Dict[str, Any]:
         """Validate transport type specific business rules."""
         result = {
             "is_valid": True,
@@ -27,7 +30,8 @@ class BusinessValidator:
         }
         
         try:
-            root = ET.fromstring(xml_content)
+            if root is None:
+                root = ET.fromstring(xml_content)
             transport_order = root.find(".//{http://xch.transporeon.com/soap/}transport_order")
             
             if transport_order is None:
@@ -239,7 +243,7 @@ class BusinessValidator:
                             f"Order item {i+1}: Recommended parameter '{required_param}' is missing"
                         )
     
-    def validate_cross_field_consistency(self, xml_content: str) -> Dict[str, Any]:
+    def validate_cross_field_consistency(self, xml_content: str, root: Optional[ET.Element] = None) -> Dict[str, Any]:
         """Validate cross-field consistency rules."""
         result = {
             "is_valid": True,
@@ -248,7 +252,8 @@ class BusinessValidator:
         }
         
         try:
-            root = ET.fromstring(xml_content)
+            if root is None:
+                root = ET.fromstring(xml_content)
             transport_order = root.find(".//{http://xch.transporeon.com/soap/}transport_order")
             
             if transport_order is None:
@@ -357,7 +362,7 @@ class BusinessValidator:
                     result["is_valid"] = False
                     break
     
-    def validate_ocean_completeness(self, xml_content: str) -> Dict[str, Any]:
+    def validate_ocean_completeness(self, xml_content: str, root: Optional[ET.Element] = None) -> Dict[str, Any]:
         """Validate ocean visibility parameter completeness."""
         result = {
             "is_valid": True,
@@ -366,7 +371,8 @@ class BusinessValidator:
         }
         
         try:
-            root = ET.fromstring(xml_content)
+            if root is None:
+                root = ET.fromstring(xml_content)
             transport_order = root.find(".//{http://xch.transporeon.com/soap/}transport_order")
             
             if transport_order is None:
@@ -407,7 +413,7 @@ class BusinessValidator:
                 
                 elif qualifier == "ocean.scac.no":
                     if value_elem is not None and value_elem.text:
-                        if not re.match(r'^[A-Z0-9]{4}$', value_elem.text):
+                        if not _SCAC_RE.match(value_elem.text):
                             result["errors"].append(f"Invalid SCAC code format: {value_elem.text}")
                             result["is_valid"] = False
         
@@ -6,6 +6,11 @@ import xml.etree.ElementTree as ET
 from typing import Dict, Any, List, Optional
 import re
 
+# Patterns checked for every stop and parameter, compiled once
+_COUNTRY_CODE_RE = re.compile(r'^[A-Z]{2}$')
+_ISO_DATETIME_RE = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}([+-]\d{2}:\d{2}|Z)$')
+_SCAC_RE = re.compile(r'^[A-Z0-9]{4}$')
+
 
 class StructuralValidator:
     """Validates XML structure and basic field requirements."""
@@ -17,7 +22,7 @@ class StructuralValidator:
         self.namespace = "http://xch.transporeon.com/soap/"
         self.ns = "{" + self.namespace + "}"
     
-    def validate_xml_structure(self, xml_content: str) -> Dict[str, Any]:
+    def validate_xml_structure(self, xml_content: str, root: Optional[ET.Element] = None) -> Dict[str, Any]:
         """Validate XML structure and well-formedness."""
         result = {
             "is_valid": True,
@@ -26,8 +31,9 @@ class StructuralValidator:
         }
         
         try:
-            # Parse XML to check well-formedness
-            root = ET.fromstring(xml_content)
+            # Parse XML to check well-formedness, unless the caller already did
+            if root is None:
+                root = ET.fromstring(xml_content)
             
             # Validate namespace
             if not self._validate_namespace(root):
@@ -199,7 +205,7 @@ class StructuralValidator:
         country = (location.find(f"{self.ns}country") or 
                   location.find("country"))
         if country is not None and country.text:
-            if not re.match(r'^[A-Z]{2}$', country.text):
+            if not _COUNTRY_CODE_RE.match(country.text):
                 result["errors"].append(f"Stop {stop_number}: country code must be 2 uppercase letters")
                 result["is_valid"] = False
     
@@ -226,10 +232,9 @@ class StructuralValidator:
     
     def _validate_datetime_format(self, datetime_str: str) -> bool:
         """Validate ISO datetime format."""
-        iso_pattern = r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}([+-]\d{2}:\d{2}|Z)$'
-        return bool(re.match(iso_pattern, datetime_str))
+        return _ISO_DATETIME_RE.match(datetime_str) is not None
     
-    def validate_field_formats(self, xml_content: str) -> Dict[str, Any]:
+    def validate_field_formats(self, xml_content: str, root: Optional[ET.Element] = None) -> Dict[str, Any]:
         """Validate field formats against field rules."""
         result = {
             "is_valid": True,
@@ -238,7 +243,8 @@ class StructuralValidator:
         }
         
         try:
-            root = ET.fromstring(xml_content)
+            if root is None:
+                root = ET.fromstring(xml_content)
             transport_order = root.find(".//{http://xch.transporeon.com/soap/}transport_order")
             
             if transport_order is None:
@@ -283,7 +289,7 @@ class StructuralValidator:
             if qualifier and value_elem is not None and value_elem.text:
                 # Check ocean-specific parameter formats
                 if qualifier == "ocean.scac.no":
-                    if not re.match(r'^[A-Z0-9]{4}$', value_elem.text):
+                    if not _SCAC_RE.match(value_elem.text):
                         result["errors"].append(f"Invalid SCAC code format: {value_elem.text}")
                         result["is_valid"] = False
     
@@ -330,7 +336,7 @@ class StructuralValidator:
             result["errors"].append(f"Field '{field_name}' must be one of: {allowed_values}")
             result["is_valid"] = False
     
-    def validate_stop_references(self, xml_content: str) -> Dict[str, Any]:
+    def validate_stop_references(self, xml_content: str, root: Optional[ET.Element] = None) -> Dict[str, Any]:
         """Validate that stop ID references are valid."""
         result = {
             "is_valid": True,
@@ -339,7 +345,8 @@ class StructuralValidator:
         }
         
         try:
-            root = ET.fromstring(xml_content)
+            if root is None:
+                root = ET.fromstring(xml_content)
             transport_order = root.find(".//{http://xch.transporeon.com/soap/}transport_order")
             
             if transport_order is None: